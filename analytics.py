@@ -0,0 +1,239 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from cache import VersionedCache, exercise_tag
+from storage import HISTORY_COLUMNS, set_volume
+
+# =========================
+# Progression Analytics
+# =========================
+# The full history is loaded into one columnar frame once per process.
+# After that, refresh() pulls only rows written since the last load and
+# re-aggregates just the (exercise, week) and (workout_type, week)
+# groups those rows touch.
+#
+# created_at is set when a row's transaction starts, and a replica may
+# lag the primary, so a row can show up after the watermark has already
+# moved past it. Each refresh reaches back REFRESH_OVERLAP before the
+# watermark and drops the rows it already holds.
+KEY = ["workout_date", "workout_type", "exercise"]
+COLUMNS = list(HISTORY_COLUMNS)
+ROLLING_WINDOW = "28D"
+
+# Chart metric -> (column, how same-day sessions combine)
+CHART_METRICS = {
+    "Est. 1RM": ("e1rm", "max"),
+    "Weight": ("weight", "max"),
+    "Reps": ("reps", "max"),
+    "Volume": ("volume", "sum"),
+    "28-day volume": ("rolling_volume", "last"),
+}
+CHART_POINTS = 150
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["workout_date"] = pd.to_datetime(df["workout_date"])
+    df["sets"] = df["sets"].astype(np.int32)
+    df["reps"] = df["reps"].astype(np.int32)
+    df["weight"] = df["weight"].astype(np.float64)
+    df["volume"] = df["sets"] * df["reps"] * df["weight"]
+    # Rows logged set by set sum their sets instead; the lists aren't kept
+    per_set = df["set_reps"].notna()
+    if per_set.any():
+        df.loc[per_set, "volume"] = [
+            set_volume(set_reps, set_weights)
+            for set_reps, set_weights
+            in zip(df.loc[per_set, "set_reps"], df.loc[per_set, "set_weights"])
+        ]
+    df = df.drop(columns=["set_reps", "set_weights"])
+    # Epley estimate; only meaningful for loaded sets with reps
+    df["e1rm"] = np.where(
+        (df["weight"] > 0) & (df["reps"] > 0),
+        df["weight"] * (1 + df["reps"] / 30),
+        np.nan
+    )
+    df["week"] = df["workout_date"] - pd.to_timedelta(
+        df["workout_date"].dt.weekday, unit="D"
+    )
+    # Unnamed levels so the key columns stay usable for groupby
+    df.index = pd.MultiIndex.from_arrays([df[k] for k in KEY], names=[None] * len(KEY))
+    return df
+
+
+def _overlapped(watermark):
+    # SQLite keeps created_at as text, Postgres as a timestamp. Rows from
+    # before SQLite migration 2 have an empty created_at; with nothing
+    # newer to go by, the read starts from the beginning (None).
+    if isinstance(watermark, str):
+        try:
+            moved = datetime.fromisoformat(watermark) - REFRESH_OVERLAP
+        except ValueError:
+            return None
+        return moved.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return watermark - REFRESH_OVERLAP
+
+
+def _versions(rows):
+    # Each (date, type, exercise) as of one write
+    return pd.MultiIndex.from_arrays([rows[k] for k in KEY] + [rows["created_at"]])
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    # the visual shape of the series (peaks, dips) when drawn. x must be
+    # sorted; the first and last points are always kept.
+    n = len(x)
+    if threshold < 2:
+        raise ValueError("lttb needs a threshold of at least 2 to keep both ends")
+    if threshold >= n:
+        return np.arange(n)
+    if threshold == 2:
+        return np.array([0, n - 1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Pick the point forming the largest triangle with the previous
+        # pick and the average of the next bucket
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _weekly(rows, by):
+    return rows.groupby([by, "week"]).agg(
+        volume=("volume", "sum"),
+        best_e1rm=("e1rm", "max"),
+        top_weight=("weight", "max"),
+    )
+
+
+class ProgressionAnalytics:
+    def __init__(self, backend, user_id):
+        self.backend = backend
+        self.user_id = user_id
+        self._lock = threading.Lock()
+        self.rows = _frame([])
+        self.watermark = None
+        self.by_exercise = _weekly(self.rows, "exercise")
+        self.by_group = _weekly(self.rows, "workout_type")
+        # Downsampled chart series, dropped per exercise as new rows arrive
+        self.charts = VersionedCache(max_entries=128, ttl=24 * 3600)
+        self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            since = None if self.watermark is None else _overlapped(self.watermark)
+            new_rows = self.backend.get_history(self.user_id, since)
+            if not new_rows:
+                return 0
+            new = _frame(new_rows)
+            new = new[~_versions(new).isin(_versions(self.rows))]
+            if new.empty:
+                return 0
+            self._apply(new)
+            return len(new)
+
+    def _apply(self, new):
+        # Upsert on (date, type, exercise), matching save_workout
+        kept = self.rows[~self.rows.index.isin(new.index)]
+        self.rows = pd.concat([kept, new]) if len(kept) else new
+        self.watermark = max(
+            (w for w in (self.watermark, new["created_at"].max()) if w is not None)
+        )
+        self.by_exercise = self._regroup(self.by_exercise, new, "exercise")
+        self.by_group = self._regroup(self.by_group, new, "workout_type")
+        self.charts.invalidate(
+            [exercise_tag(self.user_id, ex) for ex in new["exercise"].unique()]
+        )
+
+    def _regroup(self, weekly, new, by):
+        touched = pd.MultiIndex.from_frame(new[[by, "week"]].drop_duplicates())
+        affected = self.rows[
+            pd.MultiIndex.from_frame(self.rows[[by, "week"]]).isin(touched)
+        ]
+        fresh = _weekly(affected, by)
+        kept = weekly[~weekly.index.isin(touched)]
+        return pd.concat([kept, fresh]).sort_index() if len(kept) else fresh
+
+    def exercise_history(self, exercise):
+        # Per-session values plus a trailing 28-day volume
+        rows = self.rows[self.rows["exercise"] == exercise]
+        rows = rows.sort_values("workout_date").set_index("workout_date")
+        out = rows[["sets", "reps", "weight", "volume", "e1rm"]].copy()
+        out["rolling_volume"] = out["volume"].rolling(ROLLING_WINDOW).sum()
+        return out
+
+    def date_span(self, exercise):
+        # (first, last) logged date, or None
+        dates = self.rows.loc[self.rows["exercise"] == exercise, "workout_date"]
+        if dates.empty:
+            return None
+        return dates.min().date(), dates.max().date()
+
+    def chart_series(self, exercise, metric, start, end, points=CHART_POINTS):
+        # One value per day in [start, end], downsampled to at most `points`
+        return self.charts.get_or_load(
+            (exercise, metric, str(start), str(end), points),
+            [exercise_tag(self.user_id, exercise)],
+            lambda: self._chart_series(exercise, metric, start, end, points)
+        )
+
+    def _chart_series(self, exercise, metric, start, end, points):
+        column, how = CHART_METRICS[metric]
+        # Rolling values need the days before the range, so slice last
+        daily = self.exercise_history(exercise)[column].groupby(level=0).agg(how)
+        daily = daily.loc[pd.Timestamp(start):pd.Timestamp(end)].dropna()
+        keep = lttb(
+            daily.index.asi8.astype(np.float64), daily.to_numpy(np.float64), points
+        )
+        return daily.iloc[keep].to_frame(metric)
+
+    def weekly_deltas(self, exercise):
+        # Week-over-week change in volume and best e1RM
+        if exercise not in self.by_exercise.index.get_level_values(0):
+            return self.by_exercise.iloc[0:0]
+        weekly = self.by_exercise.loc[exercise].sort_index()
+        weekly["volume_delta"] = weekly["volume"].diff()
+        weekly["volume_pct"] = weekly["volume"].pct_change(fill_method=None) * 100
+        weekly["e1rm_delta"] = weekly["best_e1rm"].diff()
+        return weekly
+
+    def latest_week(self, exercise):
+        # Most recent week as plain floats (None for missing), or None
+        weekly = self.weekly_deltas(exercise)
+        if weekly.empty:
+            return None
+        last = weekly.iloc[-1]
+        return {
+            name: (None if pd.isna(value) else float(value))
+            for name, value in last.items()
+        }
+
+    def muscle_group_load(self, weeks=8):
+        # Weekly volume per workout type (the catalog's muscle groups)
+        load = self.by_group["volume"].unstack(0, fill_value=0.0)
+        return load.sort_index().tail(weeks)
+
+
+@st.cache_resource
+def get_analytics(_backend, user_id):
+    # One per user, shared by that user's sessions; the history is read
+    # in full only once
+    return ProgressionAnalytics(_backend, user_id)
@@ -1,38 +1,57 @@
 import streamlit as st
 
+from instrumentation import (
+    finish_rerun, render_debug_panel, span, start_rerun, traced_fragment
+)
+
+start_rerun()
+
 # =========================
 # 🔐 PIN Authentication
 # =========================
-APP_PIN = st.secrets["APP_PIN"]
+# st.secrets["users"] maps user ids to PINs; a lone APP_PIN is the
+# single "default" user
+USERS = dict(st.secrets.get("users", {})) or {"default": st.secrets["APP_PIN"]}
 
-if "authenticated" not in st.session_state:
-    st.session_state.authenticated = False
+with span("auth gate"):
+    if "authenticated" not in st.session_state:
+        st.session_state.authenticated = False
 
-if not st.session_state.authenticated:
-    st.title("🔒 Enter PIN")
-
-    pin_input = st.text_input(
-        "4-digit PIN",
-        type="password",
-        max_chars=4
-    )
+    if not st.session_state.authenticated:
+        st.title("🔒 Enter PIN")
 
-    if st.button("Unlock", use_container_width=True):
-        if pin_input == APP_PIN:
-            st.session_state.authenticated = True
-            st.rerun()
+        if len(USERS) > 1:
+            user_input = st.text_input("User").strip()
         else:
-            st.error("Incorrect PIN")
+            user_input = next(iter(USERS))
 
-    st.stop()
+        pin_input = st.text_input(
+            "4-digit PIN",
+            type="password",
+            max_chars=4
+        )
+
+        if st.button("Unlock", use_container_width=True):
+            if user_input in USERS and pin_input == str(USERS[user_input]):
+                st.session_state.authenticated = True
+                st.session_state.user_id = user_input
+                st.rerun()
+            else:
+                st.error("Incorrect PIN")
+
+        finish_rerun()
+        st.stop()
 
 # =========================
 # Imports (after auth)
 # =========================
-import psycopg2
-import pandas as pd
+# Kept light for cold starts: psycopg2 loads only with the Postgres
+# backend and pandas only when the progress view is opened
 from datetime import date, timedelta
 
+from catalog import get_catalog_store
+from storage import fetch_all, get_backend, workout_values
+
 # =========================
 # Page Config (Mobile-first)
 # =========================
@@ -43,155 +62,231 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# =========================
-# Supabase Connection
-# =========================
-def get_connection():
-    return psycopg2.connect(
-        host=st.secrets["database"]["host"],
-        port=st.secrets["database"]["port"],
-        dbname=st.secrets["database"]["dbname"],
-        user=st.secrets["database"]["user"],
-        password=st.secrets["database"]["password"],
-        sslmode="require",
-        connect_timeout=10
-    )
+backend = get_backend()
+user_id = st.session_state.user_id
 
-conn = get_connection()
-cursor = conn.cursor()
+catalog_store = get_catalog_store()
+catalog = catalog_store.current()
+if catalog_store.error:
+    st.warning(f"Catalog not reloaded, still using the previous version ({catalog_store.error})")
 
 # =========================
-# Workout Definitions
+# Helper Functions
 # =========================
-workout_data = {
-    "Chest & Triceps": {
-        "Warm up": ["Cycle"],
-        "Circuit set": ["High Knees", "Prone Walkout", "Deltoid Circles", "Kettlebell Halo"],
-        "Workout": [
-            "Pushups", "Incline Dumbbell Chest Press", "Dumbbell Chest Press",
-            "Dumbbell Chest Flyes", "Bench Dips",
-            "Dumbbell Tricep Extension", "Low Plank", "Crunches"
-        ],
-        "Stretch": [
-            "Sphinx Stretch", "Child's Pose",
-            "Shoulder Extension Pec Stretch",
-            "Shoulder Archer Stretch Left",
-            "Shoulder Archer Stretch Right"
-        ]
-    },
-    "Back & Biceps": {
-        "Warm up": ["Treadmill"],
-        "Circuit set": [
-            "World's Greatest Stretch Left",
-            "World's Greatest Stretch Right",
-            "Bent Over Y Raise",
-            "Alternate Toe Touches",
-            "Prone Swimmers"
-        ],
-        "Workout": [
-            "Lat Pull Down", "Machine Seated Row",
-            "Dumbbell Bent-over Row",
-            "Dumbbell Seated Bicep Curl",
-            "Close Grip Bicep Curl",
-            "Side Plank Left", "Side Plank Right",
-            "Bicycle Crunches"
-        ],
-        "Stretch": [
-            "Sphinx Stretch", "Thread the Needle Left",
-            "Thread the Needle Right", "Child's Pose"
-        ]
-    },
-    "Legs": {
-        "Warm up": ["Cycle"],
-        "Circuit set": [
-            "Dynamic Pigeon Stretch Left",
-            "Dynamic Pigeon Stretch Right",
-            "Half Wipers - Scale Down",
-            "Table Top Up and Down",
-            "Side to Side Shuffle"
-        ],
-        "Workout": [
-            "Body Weight Squat", "Leg Press",
-            "Machine Hamstring Curls",
-            "Seated Machine Calf Raise",
-            "Bird Dog", "Alternate Leg Raise"
-        ],
-        "Stretch": [
-            "Hamstring Stretch", "Child's Pose",
-            "Prone Quad Stretch Left",
-            "Prone Quad Stretch Right",
-            "Butterfly Stretch"
+FIELDS = ("sets", "reps", "weight")
+
+def field_key(workout_date, exercise, field):
+    return f"{workout_date}_{exercise}_{field}"
+
+def set_key(workout_date, exercise, index, field):
+    return field_key(workout_date, exercise, f"set{index}_{field}")
+
+def last_values_of(last):
+    # A get_last_exercises tuple as save_workout values
+    sets, reps, weight, set_reps, set_weights = last
+    values = {"sets": sets, "reps": reps, "weight": weight}
+    if set_reps:
+        values.update(set_reps=list(set_reps), set_weights=list(set_weights))
+    return values
+
+def set_defaults(baseline, count):
+    # Per-set values to prefill `count` sets with; extra sets repeat the last
+    reps = list(baseline.get("set_reps") or [baseline["reps"]])
+    weights = list(baseline.get("set_weights") or [baseline["weight"]])
+    reps += reps[-1:] * (count - len(reps))
+    weights += weights[-1:] * (count - len(weights))
+    return reps[:count], weights[:count]
+
+def prefill_card(workout_date, exercise, last, saved):
+    # Widgets start from the day's saved values, else the last logged ones.
+    # The baseline is what's saved for the day, None until the first save.
+    key = field_key(workout_date, exercise, "values")
+    saved = last_values_of(saved[1:]) if saved else None
+    st.session_state.setdefault("baseline", {})[key] = saved
+    st.session_state.setdefault("prefill", {}).setdefault(
+        key, saved or last_values_of(last)
+    )
+
+def card_values(workout_date, exercise):
+    # The card's values in save_workout's shape, falling back to the
+    # prefill for widgets not rendered yet
+    baseline = st.session_state.setdefault("prefill", {})[
+        field_key(workout_date, exercise, "values")
+    ]
+    state = st.session_state
+    values = {
+        field: state.get(field_key(workout_date, exercise, field), baseline[field])
+        for field in FIELDS
+    }
+    if state.get(field_key(workout_date, exercise, "per_set"), "set_reps" in baseline):
+        reps, weights = set_defaults(baseline, values["sets"])
+        values["set_reps"] = [
+            state.get(set_key(workout_date, exercise, i, "reps"), value)
+            for i, value in enumerate(reps)
         ]
-    },
-    "Shoulders": {
-        "Warm up": ["Cross Trainer"],
-        "Circuit set": [
-            "World's Greatest Stretch Left",
-            "World's Greatest Stretch Right",
-            "Cat Camel", "Deltoid Circles", "Footfires"
-        ],
-        "Workout": [
-            "Machine Shoulder Press",
-            "1-arm Dumbbell Lateral Raise Left",
-            "1-arm Dumbbell Lateral Raise Right",
-            "Dumbbell Alternating Front Raise",
-            "Machine Reverse Flyes",
-            "Prone YTW",
-            "Shoulder Taps",
-            "Hollow Hold",
-            "Side Plank Left",
-            "Side Plank Right"
-        ],
-        "Stretch": [
-            "Sphinx Stretch",
-            "Lateral Neck Stretch Left",
-            "Lateral Neck Stretch Right",
-            "Pec Stretch",
-            "Downward Dog"
+        values["set_weights"] = [
+            state.get(set_key(workout_date, exercise, i, "weight"), value)
+            for i, value in enumerate(weights)
         ]
-    }
+    return values
+
+def is_dirty(workout_date, exercise, section):
+    # Differs from what's saved for the day. Before the first save, edited
+    # cards count, and so do Workout cards prefilled from the last session
+    key = field_key(workout_date, exercise, "values")
+    if key not in st.session_state.setdefault("prefill", {}):
+        return False
+    values = card_values(workout_date, exercise)
+    saved = st.session_state.setdefault("baseline", {}).get(key)
+    if saved is None:
+        return values != st.session_state["prefill"][key] or (
+            section == "Workout" and values["sets"] > 0
+        )
+    # Compared as saved, since per-set saves derive sets/reps/weight
+    return workout_values(values) != workout_values(saved)
+
+def new_records(records, workout_date):
+    # Records beaten on that day; a first log doesn't count as beating one
+    return [
+        key for key, (_, previous, day) in records.items()
+        if day == str(workout_date) and previous is not None
+    ]
+
+def record_caption(records, weight):
+    parts = []
+    if best := records.get(("weight", 0.0)):
+        parts.append(f"{best[0]:g} kg")
+    if best := records.get(("reps", float(weight))):
+        parts.append(f"{best[0]:g} reps @ {weight:g} kg")
+    if best := records.get(("volume", 0.0)):
+        parts.append(f"{best[0]:,.0f} kg volume")
+    return "🏆 Best: " + " · ".join(parts) if parts else None
+
+@traced_fragment
+def exercise_card(exercise, section, workout_date, records):
+    # Editing a field reruns only this card, not the whole page
+    baseline = st.session_state["prefill"][field_key(workout_date, exercise, "values")]
+
+    st.markdown(
+        f"**{exercise}**"
+        + (" 🏆 PR" if new_records(records, workout_date) else "")
+        + (" ✏️" if is_dirty(workout_date, exercise, section) else "")
+    )
+    values = card_values(workout_date, exercise)
+    weight = max(values.get("set_weights") or [values["weight"]])
+    if caption := record_caption(records, weight):
+        st.caption(caption)
+
+    video_url = catalog.video(exercise)
+
+    if video_url:
+        show_demo = st.toggle("Show demo", key=f"video_{exercise}")
+
+        if show_demo:
+            st.video(video_url)
+        elif poster := catalog.poster(exercise):
+            st.image(poster, width=160)
+
+    # Pyramids and drop sets log reps and weight for each set
+    per_set = st.toggle(
+        "Log each set",
+        value="set_reps" in baseline,
+        key=field_key(workout_date, exercise, "per_set")
+    )
+
+    sets = st.number_input(
+        "Sets",
+        min_value=0,
+        value=baseline["sets"],
+        key=field_key(workout_date, exercise, "sets")
+    )
+
+    if per_set:
+        set_reps, set_weights = set_defaults(baseline, sets)
+        for i, (reps, weight) in enumerate(zip(set_reps, set_weights)):
+            reps_column, weight_column = st.columns(2)
+            reps_column.number_input(
+                f"Set {i + 1} reps",
+                min_value=0,
+                value=reps,
+                key=set_key(workout_date, exercise, i, "reps")
+            )
+            weight_column.number_input(
+                f"Set {i + 1} kg",
+                min_value=0.0,
+                step=0.5,
+                value=float(weight),
+                key=set_key(workout_date, exercise, i, "weight")
+            )
+    else:
+        st.number_input(
+            "Reps",
+            min_value=0,
+            value=baseline["reps"],
+            key=field_key(workout_date, exercise, "reps")
+        )
+
+        st.number_input(
+            "Weight (kg)",
+            min_value=0.0,
+            step=0.5,
+            value=float(baseline["weight"]),
+            key=field_key(workout_date, exercise, "weight")
+        )
+
+    st.divider()
+
+@traced_fragment(run_every=5)
+def sync_status_badge():
+    # Polls itself, not the whole page
+    status = backend.sync_status()
+    if status["pending"]:
+        message = f"⏳ {status['pending']} save(s) waiting to sync"
+        if status["last_error"]:
+            message += f" — retrying ({status['last_error']})"
+        st.caption(message)
+    else:
+        st.caption("☁️ All saves synced")
+    if status["rejected"]:
+        st.caption(f"⚠️ Dropped a save the database refused ({status['rejected']})")
+
+def collect_changes(workout_date, sections):
+    # Only the exercises is_dirty picks out, in save_workout's
+    # {section: {exercise: values}} shape. Card values live in session
+    # state, so this sees every fragment.
+    changes = {}
+    for section, exercises in sections.items():
+        for exercise in exercises:
+            if is_dirty(workout_date, exercise, section):
+                changes.setdefault(section, {})[exercise] = card_values(
+                    workout_date, exercise
+                )
+    return changes
+
+# Each view reads precomputed rollups one grain below the period shown
+SUMMARY_VIEWS = {
+    "Week": ("day", "📅"),
+    "Month": ("week", "🗓️ Week of"),
+    "Year": ("month", "🗓️ Month of"),
 }
 
-# =========================
-# Helper Functions
-# =========================
-def get_last_exercise(exercise):
-    cursor.execute("""
-        SELECT sets, reps, weight
-        FROM workouts
-        WHERE exercise = %s
-        ORDER BY workout_date DESC, created_at DESC
-        LIMIT 1
-    """, (exercise,))
-    row = cursor.fetchone()
-    return row if row else (0, 0, 0.0)
-
-def save_workout(workout_date, workout_type, data):
-    cursor.execute("""
-        DELETE FROM workouts
-        WHERE workout_date = %s AND workout_type = %s
-    """, (workout_date, workout_type))
-
-    for section, exercises in data.items():
-        for ex, vals in exercises.items():
-            cursor.execute("""
-                INSERT INTO workouts
-                (workout_date, workout_type, section, exercise, sets, reps, weight)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                workout_date,
-                workout_type,
-                section,
-                ex,
-                vals["sets"],
-                vals["reps"],
-                vals["weight"]
-            ))
-    conn.commit()
-
-def get_exercise_video(exercise_name):
-    slug = exercise_name.lower().replace(" ", "-")
-    return f"https://raw.githubusercontent.com/imsandeepreddy/workout-tracker/main/exercises/{slug}.mp4"
+def summary_read(view, day):
+    # The (fn, *args) read behind a summary view, in fetch_all's shape
+    if view == "Week":
+        start = day - timedelta(days=day.weekday())
+        return (backend.get_weekly_summary, user_id, start, start + timedelta(days=6))
+    if view == "Month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    else:
+        start, end = day.replace(month=1, day=1), day.replace(month=12, day=31)
+    return (backend.get_rollups, user_id, SUMMARY_VIEWS[view][0], start, end)
+
+def mark_saved(workout_date, changes):
+    baseline = st.session_state.setdefault("baseline", {})
+    for exercises in changes.values():
+        for exercise, values in exercises.items():
+            baseline[field_key(workout_date, exercise, "values")] = values
 
 # =========================
 # 🏋️ UI
@@ -201,109 +296,221 @@ st.title("🏋️ Workout Tracker")
 st.markdown("### 🗓️ Workout Setup")
 
 selected_date = st.date_input("Date", date.today())
-workout_type = st.selectbox("Workout Type", workout_data.keys())
+workout_type = st.selectbox("Workout Type", list(catalog.workouts))
 
-workout_input = {}
+# The summary widgets render further down, but their values from the last
+# run are already in session state, so both reads can start now
+summary_prefetch = summary_read(
+    st.session_state.get("summary_view", "Week"),
+    st.session_state.get("summary_week", selected_date)
+)
+
+with span("prefill"):
+    prefetched = fetch_all({
+        "last_values": (
+            backend.get_last_exercises,
+            user_id,
+            catalog.exercises[workout_type]
+        ),
+        "records": (
+            backend.get_personal_records,
+            user_id,
+            catalog.exercises[workout_type]
+        ),
+        "saved": (backend.get_workout, user_id, selected_date, workout_type),
+        "summary": summary_prefetch,
+    })
+    last_values = prefetched["last_values"]
+    saved = prefetched["saved"]
+    records = prefetched["records"]
 
 # =========================
 # Workout Entry (Mobile)
 # =========================
-for section, exercises in workout_data[workout_type].items():
-    expanded = section == "Workout"
+with span("entry form"):
+    for section, exercises in catalog.workouts[workout_type].items():
+        expanded = section == "Workout"
+
+        with st.expander(section, expanded=expanded):
+            for exercise in exercises:
+                prefill_card(
+                    selected_date,
+                    exercise,
+                    last_values.get(exercise, (0, 0, 0.0, None, None)),
+                    saved.get(exercise)
+                )
+                exercise_card(
+                    exercise,
+                    section,
+                    selected_date,
+                    records.get(exercise, {})
+                )
 
-    with st.expander(section, expanded=expanded):
-        workout_input[section] = {}
+# =========================
+# Save Workout
+# =========================
+if st.button("💾 Save Workout", use_container_width=True):
+    rejected = None
+    with span("save"):
+        changes = collect_changes(selected_date, catalog.workouts[workout_type])
+        if changes:
+            try:
+                backend.save_workout(user_id, selected_date, workout_type, changes)
+            except ValueError as exc:
+                rejected = exc
+            else:
+                mark_saved(selected_date, changes)
+                # Read the summary again so it includes this save
+                summary_prefetch = None
+                saved_records = backend.get_personal_records(
+                    user_id, [ex for exercises in changes.values() for ex in exercises]
+                )
+
+    if rejected:
+        st.error(f"Not saved: {rejected}")
+    elif changes:
+        changed = sum(len(exercises) for exercises in changes.values())
+        beaten = [
+            ex for ex, ex_records in saved_records.items()
+            if new_records(ex_records, selected_date)
+        ]
+        st.success(
+            f"Workout saved ({changed} changed)"
+            + (f" — 🏆 new PR: {', '.join(beaten)}" if beaten else "")
+        )
+    else:
+        st.info("Nothing changed since the last save")
 
-        for exercise in exercises:
-            last_sets, last_reps, last_weight = get_last_exercise(exercise)
+# Only registered in write-behind mode, so other tabs don't poll
+if backend.sync_status() is not None:
+    sync_status_badge()
 
-            st.markdown(f"**{exercise}**")
+# =========================
+# 📊 Summary (Mobile cards)
+# =========================
+st.markdown("---")
+st.subheader("📊 Summary")
 
-            video_url = get_exercise_video(exercise)
+summary_view = st.radio(
+    "View", list(SUMMARY_VIEWS), horizontal=True, key="summary_view"
+)
+week_date = st.date_input(
+    f"Select {summary_view.lower()}", selected_date, key="summary_week"
+)
 
-            if video_url:
-                show_demo = st.toggle("Show demo", key=f"video_{exercise}")
+with span("summary"):
+    label = SUMMARY_VIEWS[summary_view][1]
+    summary = summary_read(summary_view, week_date)
+    if summary == summary_prefetch:
+        rows = prefetched["summary"]
+    else:
+        fn, *args = summary
+        rows = fn(*args)
+
+    if rows:
+        for period, workout_kind, exercise_count, total_sets, total_reps, volume in rows:
+            st.markdown(
+                f"""
+                **{label} {period} — {workout_kind}**  
+                • Exercises: {exercise_count}  
+                • Sets: {total_sets}  
+                • Reps: {total_reps}  
+                • Volume: {round(volume or 0, 1)}
+                """
+            )
+            st.divider()
+    else:
+        st.info(f"No workouts logged for this {summary_view.lower()}")
 
-                if show_demo:
-                    st.video(video_url)
+# =========================
+# 📈 Progress
+# =========================
+st.markdown("---")
 
-            sets = st.number_input(
-                "Sets",
-                min_value=0,
-                value=last_sets,
-                key=f"{selected_date}_{exercise}_sets"
-            )
+if st.toggle("📈 Show progress", key="show_progress"):
+    with span("progress"):
+        from analytics import CHART_METRICS, get_analytics
 
-            reps = st.number_input(
-                "Reps",
-                min_value=0,
-                value=last_reps,
-                key=f"{selected_date}_{exercise}_reps"
-            )
+        analytics = get_analytics(backend, user_id)
+        analytics.refresh()
 
-            weight = st.number_input(
-                "Weight (kg)",
-                min_value=0.0,
-                step=0.5,
-                value=last_weight,
-                key=f"{selected_date}_{exercise}_weight"
-            )
+        progress_exercise = st.selectbox(
+            "Exercise",
+            catalog.exercises[workout_type],
+            key="progress_exercise"
+        )
+        last = analytics.latest_week(progress_exercise)
 
-            workout_input[section][exercise] = {
-                "sets": sets,
-                "reps": reps,
-                "weight": weight
-            }
+        if last is None:
+            st.info("No history for this exercise yet")
+        else:
+            col1, col2 = st.columns(2)
+            col1.metric(
+                "Best est. 1RM (kg)",
+                f"{last['best_e1rm']:.1f}" if last["best_e1rm"] is not None else "—",
+                delta=f"{last['e1rm_delta']:.1f}" if last["e1rm_delta"] is not None else None
+            )
+            col2.metric(
+                "Volume this week",
+                f"{last['volume']:.0f}",
+                delta=f"{last['volume_delta']:.0f}" if last["volume_delta"] is not None else None
+            )
 
-            st.divider()
+            # Downsampled server-side to the selected range; each range is
+            # cached, so moving the slider back and forth doesn't recompute
+            first_day, last_day = analytics.date_span(progress_exercise)
+            metric = st.radio(
+                "Chart", list(CHART_METRICS), horizontal=True, key="progress_metric"
+            )
+            if first_day < last_day:
+                chart_start, chart_end = st.slider(
+                    "Range",
+                    min_value=first_day,
+                    max_value=last_day,
+                    value=(max(first_day, last_day - timedelta(days=365)), last_day),
+                    key=f"progress_range_{progress_exercise}"
+                )
+            else:
+                chart_start, chart_end = first_day, last_day
+            st.line_chart(
+                analytics.chart_series(progress_exercise, metric, chart_start, chart_end)
+            )
 
-# =========================
-# Save Workout
-# =========================
-if st.button("💾 Save Workout", use_container_width=True):
-    save_workout(selected_date, workout_type, workout_input)
-    st.success("Workout saved")
+        st.caption("Weekly volume by muscle group")
+        st.bar_chart(analytics.muscle_group_load())
 
 # =========================
-# 📊 Weekly Daily Summary (Mobile cards)
+# 📦 Export / Import
 # =========================
-st.markdown("---")
-st.subheader("📊 Weekly Summary")
-
-week_date = st.date_input("Select week", selected_date)
-start_week = week_date - timedelta(days=week_date.weekday())
-end_week = start_week + timedelta(days=6)
-
-cursor.execute("""
-    SELECT workout_date,
-           workout_type,
-           COUNT(DISTINCT exercise),
-           SUM(sets),
-           SUM(reps),
-           SUM(sets * reps * weight)
-    FROM workouts
-    WHERE workout_date BETWEEN %s AND %s
-    GROUP BY workout_date, workout_type
-    ORDER BY workout_date, workout_type
-""", (start_week, end_week))
-
-rows = cursor.fetchall()
-
-if rows:
-    df = pd.DataFrame(rows, columns=[
-        "Date", "Workout Type", "Exercises", "Sets", "Reps", "Volume"
-    ])
-
-    for _, r in df.iterrows():
-        st.markdown(
-            f"""
-            **📅 {r['Date']} — {r['Workout Type']}**  
-            • Exercises: {r['Exercises']}  
-            • Sets: {r['Sets']}  
-            • Reps: {r['Reps']}  
-            • Volume: {round(r['Volume'], 1)}
-            """
+if st.toggle("📦 Export / import", key="show_transfer"):
+    with span("transfer"):
+        from transfer import FORMATS, export_bytes, format_for, import_history
+
+        export_format = st.radio("Format", FORMATS, horizontal=True, key="export_format")
+
+        st.download_button(
+            "⬇️ Download history",
+            # Runs only when the button is clicked
+            data=lambda: export_bytes(backend, user_id, export_format),
+            file_name=f"workouts-{date.today()}.{export_format}",
+            on_click="ignore",
+            use_container_width=True
         )
-        st.divider()
-else:
-    st.info("No workouts logged for this week")
+
+        upload = st.file_uploader("Import history", type=list(FORMATS), key="import_file")
+        if upload is not None and st.button("⬆️ Import", use_container_width=True):
+            try:
+                report = import_history(backend, user_id, upload, format_for(upload.name))
+            except ValueError as exc:
+                st.error(f"Import failed: {exc}")
+            else:
+                st.success(
+                    f"Imported {report['inserted']} rows "
+                    f"({report['duplicates']} already present, "
+                    f"{report['archived']} in archived history, {report['invalid']} invalid)"
+                )
+                for error in report["errors"]:
+                    st.caption(error)
+
+finish_rerun()
+render_debug_panel()
@@ -0,0 +1,179 @@
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import quote
+
+from storage import EXPORT_CHUNK_SIZE, HISTORY_COLUMNS, set_json
+from transfer import parquet_schema, parquet_value
+
+# =========================
+# Cold History Archive
+# =========================
+# Rows older than the horizon move out of the workouts table into one
+# zstd-compressed Parquet file per user and month:
+#
+#     <root>/<user_id>/<YYYY-MM>.parquet
+#
+# Only archive_history() writes them; ArchiveBackend in storage.py reads
+# them together with the database. pyarrow is imported on first use.
+DEFAULT_HORIZON_DAYS = 730
+
+
+def archive_cutoff(horizon_days, today=None):
+    # Whole months are archived: everything before the first day of the
+    # month the horizon falls in
+    day = (today or date.today()) - timedelta(days=horizon_days)
+    return day.replace(day=1)
+
+
+def _row_key(row):
+    # (date, type, exercise), as in the workouts unique key
+    return str(row[0]), row[1], row[3]
+
+
+def _restorer(name, flavor):
+    # Values come back typed the way the live backend returns them, so
+    # archived and database rows mix in one frame or export
+    if name == "workout_date":
+        return (lambda value: value) if flavor == "postgres" else str
+    if name == "created_at" and flavor == "postgres":
+        return datetime.fromisoformat
+    if name in ("set_reps", "set_weights") and flavor == "sqlite":
+        return set_json
+    return lambda value: value
+
+
+class Archive:
+    def __init__(self, root):
+        self.root = Path(root)
+        # user_id -> (partition signature, newest created_at in them)
+        self._newest = {}
+
+    def _dir(self, user_id):
+        return self.root / quote(user_id, safe="")
+
+    def partitions(self, user_id):
+        # [(month, path, mtime_ns)] oldest first
+        try:
+            with os.scandir(self._dir(user_id)) as entries:
+                found = [
+                    (entry.name[:-len(".parquet")], Path(entry.path), entry.stat().st_mtime_ns)
+                    for entry in entries if entry.name.endswith(".parquet")
+                ]
+        except FileNotFoundError:
+            return []
+        return sorted(found)
+
+    def _read(self, path, columns, chunk_size, flavor=None):
+        import pyarrow.parquet as pq
+
+        restore = [_restorer(name, flavor) for name in columns]
+        parquet = pq.ParquetFile(path)
+        # Months archived before per-set logging have no set columns
+        stored = [name for name in columns if name in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(chunk_size, columns=stored):
+            values = [
+                batch.column(name).to_pylist() if name in stored else [None] * batch.num_rows
+                for name in columns
+            ]
+            yield [
+                tuple(fn(value) for fn, value in zip(restore, row))
+                for row in zip(*values)
+            ]
+
+    def iter_rows(self, user_id, columns, chunk_size, flavor):
+        # Lists of up to chunk_size rows of `columns`, in date order
+        for _, path, _ in self.partitions(user_id):
+            yield from self._read(path, columns, chunk_size, flavor)
+
+    def history(self, user_id, since, flavor):
+        # Archived rows written after `since` (all when None), oldest
+        # created_at first. Partitions only change when rows are archived,
+        # so an incremental read usually stops at the cached newest value.
+        partitions = self.partitions(user_id)
+        if not partitions:
+            return []
+        if since is not None and self._newest_created(user_id, partitions) <= str(since):
+            return []
+        rows = [
+            row
+            for _, path, _ in partitions
+            for chunk in self._read(path, HISTORY_COLUMNS, EXPORT_CHUNK_SIZE, flavor)
+            for row in chunk
+            if since is None or str(row[7]) > str(since)
+        ]
+        rows.sort(key=lambda row: str(row[7]))
+        return rows
+
+    def _newest_created(self, user_id, partitions):
+        signature = tuple(partitions)
+        cached = self._newest.get(user_id)
+        if cached is None or cached[0] != signature:
+            newest = max(
+                (value for _, path, _ in partitions
+                 for chunk in self._read(path, ["created_at"], EXPORT_CHUNK_SIZE)
+                 for (value,) in chunk),
+                default=""
+            )
+            cached = self._newest[user_id] = (signature, newest)
+        return cached[1]
+
+    def write_month(self, user_id, month, rows):
+        # rows are HISTORY_COLUMNS tuples from one month. They replace any
+        # archived row with the same key; the new file is written aside,
+        # synced, then renamed over the old one.
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._dir(user_id) / f"{month}.parquet"
+        merged = {}
+        if path.exists():
+            for chunk in self._read(path, HISTORY_COLUMNS, EXPORT_CHUNK_SIZE):
+                merged.update((_row_key(row), row) for row in chunk)
+        merged.update((_row_key(row), row) for row in rows)
+        ordered = [merged[key] for key in sorted(merged)]
+
+        schema = parquet_schema(HISTORY_COLUMNS)
+        table = pa.Table.from_arrays([
+            pa.array([parquet_value(name, row[i]) for row in ordered], schema.field(name).type)
+            for i, name in enumerate(HISTORY_COLUMNS)
+        ], schema=schema)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + ".tmp")
+        pq.write_table(table, temp, compression="zstd")
+        with open(temp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+        directory = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        return len(ordered)
+
+
+def archive_history(backend, archive, user_id, before):
+    # Moves user_id's rows dated before `before` into monthly partitions,
+    # then deletes them from the database. Rows re-saved while this runs
+    # have a newer created_at and stay for the next run. Returns the
+    # number of rows moved.
+    moved, newest = 0, None
+    month, rows = None, []
+    for chunk in backend.iter_cold_rows(user_id, before, EXPORT_CHUNK_SIZE):
+        for row in chunk:
+            row_month = str(row[0])[:7]
+            if row_month != month and rows:
+                archive.write_month(user_id, month, rows)
+                moved += len(rows)
+                rows = []
+            month = row_month
+            rows.append(row)
+            newest = row[7] if newest is None else max(newest, row[7])
+    if rows:
+        archive.write_month(user_id, month, rows)
+        moved += len(rows)
+
+    if moved:
+        backend.drop_cold_rows(user_id, before, newest)
+    return moved
@@ -0,0 +1,160 @@
+"""Exercise demo video manifest and renditions.
+
+    python assets.py    # build renditions + posters (needs ffmpeg), write manifest.json
+
+The app loads manifest.json at startup and only rescans the videos when
+it is missing or out of date.
+"""
+import json
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+import streamlit as st
+
+# =========================
+# Exercise Video Assets
+# =========================
+EXERCISES_DIR = Path(__file__).resolve().parent / "exercises"
+RENDITIONS_DIR = EXERCISES_DIR / "renditions"
+MANIFEST_PATH = EXERCISES_DIR / "manifest.json"
+
+# Small enough to start instantly on mobile data
+RENDITION_HEIGHT = 480
+RENDITION_CRF = 30
+
+
+def slugify(exercise_name):
+    return exercise_name.lower().replace(" ", "-")
+
+
+def _mp4_duration(path):
+    # Reads moov/mvhd directly so the app needs no ffprobe at runtime
+    with open(path, "rb") as f:
+        data = f.read()
+
+    def boxes(start, end):
+        while start + 8 <= end:
+            size, kind = struct.unpack(">I4s", data[start:start + 8])
+            header = 8
+            if size == 1:
+                size = struct.unpack(">Q", data[start + 8:start + 16])[0]
+                header = 16
+            elif size == 0:
+                size = end - start
+            if size < header:
+                return
+            yield kind, start + header, start + size
+            start += size
+
+    for kind, body, end in boxes(0, len(data)):
+        if kind != b"moov":
+            continue
+        for child, child_body, _ in boxes(body, end):
+            if child != b"mvhd":
+                continue
+            if data[child_body] == 1:
+                timescale, duration = struct.unpack(">IQ", data[child_body + 20:child_body + 32])
+            else:
+                timescale, duration = struct.unpack(">II", data[child_body + 12:child_body + 20])
+            return round(duration / timescale, 2) if timescale else None
+    return None
+
+
+def scan_assets():
+    manifest = {}
+    for path in sorted(EXERCISES_DIR.glob("*.mp4")):
+        slug = path.stem
+        rendition = RENDITIONS_DIR / f"{slug}-{RENDITION_HEIGHT}p.mp4"
+        poster = RENDITIONS_DIR / f"{slug}.jpg"
+        try:
+            duration = _mp4_duration(path)
+        except (OSError, struct.error):
+            duration = None
+        manifest[slug] = {
+            "source": path.name,
+            "size": path.stat().st_size,
+            "duration": duration,
+            "rendition": rendition.relative_to(EXERCISES_DIR).as_posix() if rendition.exists() else None,
+            "rendition_size": rendition.stat().st_size if rendition.exists() else None,
+            "poster": poster.relative_to(EXERCISES_DIR).as_posix() if poster.exists() else None,
+        }
+    return manifest
+
+
+def build_renditions():
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        print("ffmpeg not found; manifest will point at the original files")
+        return
+
+    RENDITIONS_DIR.mkdir(exist_ok=True)
+    for path in sorted(EXERCISES_DIR.glob("*.mp4")):
+        rendition = RENDITIONS_DIR / f"{path.stem}-{RENDITION_HEIGHT}p.mp4"
+        poster = RENDITIONS_DIR / f"{path.stem}.jpg"
+
+        if not rendition.exists() or rendition.stat().st_mtime < path.stat().st_mtime:
+            # faststart puts the moov box first so playback begins before
+            # the whole file has downloaded
+            subprocess.run([
+                ffmpeg, "-y", "-loglevel", "error", "-i", str(path),
+                "-vf", f"scale=-2:{RENDITION_HEIGHT}",
+                "-c:v", "libx264", "-preset", "slow", "-crf", str(RENDITION_CRF),
+                "-movflags", "+faststart", "-an", str(rendition)
+            ], check=True)
+
+        if not poster.exists() or poster.stat().st_mtime < path.stat().st_mtime:
+            subprocess.run([
+                ffmpeg, "-y", "-loglevel", "error", "-ss", "0.5", "-i", str(path),
+                "-frames:v", "1", "-vf", f"scale=-2:{RENDITION_HEIGHT}",
+                "-q:v", "5", str(poster)
+            ], check=True)
+
+
+def write_manifest():
+    manifest = scan_assets()
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def load_manifest():
+    # manifest.json as written by `python assets.py`, as long as it still
+    # lists the same source videos at the same sizes; otherwise a fresh
+    # scan, which reads every mp4 for its duration
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text())
+    except (OSError, ValueError):
+        return scan_assets()
+    sources = {path.name: path.stat().st_size for path in EXERCISES_DIR.glob("*.mp4")}
+    listed = {asset.get("source"): asset.get("size") for asset in manifest.values()}
+    if listed != sources:
+        return scan_assets()
+    return manifest
+
+
+@st.cache_resource
+def get_manifest():
+    # Loaded once per process at startup, never per rerun
+    return load_manifest()
+
+
+def video_path(asset):
+    # Local path to the lightest available file, or None if there is no demo.
+    # Streamlit's media endpoint serves it with HTTP range support.
+    if not asset:
+        return None
+    return str(EXERCISES_DIR / (asset["rendition"] or asset["source"]))
+
+
+def poster_path(asset):
+    if not asset or not asset["poster"]:
+        return None
+    return str(EXERCISES_DIR / asset["poster"])
+
+
+if __name__ == "__main__":
+    build_renditions()
+    manifest = write_manifest()
+    for slug, asset in manifest.items():
+        print(f"{slug}: {asset['size']} bytes, {asset['duration']}s, rendition={asset['rendition']}")
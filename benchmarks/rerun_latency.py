@@ -0,0 +1,150 @@
+"""Drive app.py through Streamlit's AppTest harness and report rerun cost.
+
+    python -m benchmarks.synthetic_history --years 5 --sqlite-path bench.db
+    python -m benchmarks.rerun_latency --sqlite-path bench.db --output results.json
+    python -m benchmarks.rerun_latency --sqlite-path bench.db --compare results.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+
+
+def new_session(sqlite_path):
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["APP_PIN"] = "0000"
+    at.secrets["storage"] = {"backend": "sqlite", "sqlite_path": sqlite_path}
+    at.session_state["authenticated"] = True
+    at.session_state["user_id"] = "default"
+    return at
+
+
+def _entry_page(at):
+    at.run()
+
+
+def _entry_edit(at):
+    field = at.number_input[0]
+    field.set_value(field.value + 1).run()
+
+
+def _save(at):
+    # Saves send only edited exercises, so change one field first
+    field = at.number_input[0]
+    field.set_value(field.value + 1)
+    next(b for b in at.button if "Save" in b.label).click().run()
+
+
+def _weekly_summary(at):
+    week = at.date_input(key="summary_week")
+    week.set_value(week.value - timedelta(days=7)).run()
+
+
+# (name, needs an already-rendered session, action)
+SCENARIOS = [
+    ("entry_page", False, _entry_page),
+    ("entry_edit", True, _entry_edit),
+    ("save", True, _save),
+    ("weekly_summary", True, _weekly_summary),
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_scenario(sqlite_path, action, prepared, repeats):
+    timings, queries, peaks = [], [], []
+
+    for _ in range(repeats):
+        at = new_session(sqlite_path)
+        if prepared:
+            at.run()
+        tracemalloc.start()
+        start = time.perf_counter()
+        action(at)
+        timings.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        queries.append(at.session_state["rerun_traces"][-1]["query_count"])
+
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    return {
+        "runs": repeats,
+        "latency_ms": {
+            "mean": statistics.fmean(timings),
+            "p50": _percentile(timings, 50),
+            "p95": _percentile(timings, 95),
+            "max": max(timings),
+        },
+        "queries": statistics.median(queries),
+        "peak_memory_kb": max(peaks),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+        before = previous["latency_ms"]["p50"]
+        after = current["latency_ms"]["p50"]
+        change = (after - before) / before * 100 if before else 0.0
+        print(
+            f"{name:16} p50 {before:8.1f} -> {after:8.1f} ms ({change:+.1f}%)"
+            f"  queries {previous['queries']} -> {current['queries']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sqlite-path", default="bench.db")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    # Warm-up run pays for imports and schema checks once
+    new_session(args.sqlite_path).run()
+
+    results = {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "sqlite_path": args.sqlite_path,
+        "scenarios": {
+            name: run_scenario(args.sqlite_path, action, prepared, args.repeats)
+            for name, prepared, action in SCENARIOS
+        },
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Profile a cold start: import cost and time to first paint.
+
+    python -m benchmarks.startup_profile --sqlite-path bench.db
+    python -m benchmarks.startup_profile --sqlite-path bench.db --output startup.json
+
+Each measurement runs in a fresh interpreter with -X importtime, the
+closest local stand-in for a scaled-to-zero container's first request.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line on stdout
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+
+def loaded():
+    return sorted(m for m in ("pandas", "numpy", "psycopg2", "pyarrow") if m in sys.modules)
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.secrets["APP_PIN"] = "0000"
+at.secrets["storage"] = {"backend": "sqlite", "sqlite_path": sys.argv[2]}
+harness_ms = (time.perf_counter() - start) * 1000
+
+t = time.perf_counter()
+at.run()
+pin_ms = (time.perf_counter() - t) * 1000
+pin_modules = loaded()
+
+at.session_state["authenticated"] = True
+at.session_state["user_id"] = "default"
+t = time.perf_counter()
+at.run()
+main_ms = (time.perf_counter() - t) * 1000
+
+print(json.dumps({
+    "harness_ms": harness_ms,
+    "pin_screen_ms": pin_ms,
+    "main_page_ms": main_ms,
+    "heavy_modules_after_pin": pin_modules,
+    "heavy_modules_after_main": loaded(),
+    "error": at.exception[0].message if at.exception else None,
+}))
+"""
+
+# Top-level packages worth reporting from the -X importtime output
+WATCHED = {
+    "streamlit", "pandas", "numpy", "psycopg2", "pyarrow",
+    "storage", "analytics", "assets", "catalog", "instrumentation",
+    "journal", "cache", "migrations", "db",
+}
+
+
+def _import_times(stderr):
+    # "import time: self [us] | cumulative | imported package"
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[12:].split("|"))
+        if name in WATCHED:
+            times[name] = max(times.get(name, 0), int(cumulative) / 1000)
+    return times
+
+
+def profile_once(sqlite_path):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD,
+         str(ROOT / "app.py"), sqlite_path],
+        capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["import_ms"] = _import_times(result.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sqlite-path", default="bench.db")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [profile_once(str(Path(args.sqlite_path).resolve())) for _ in range(args.repeats)]
+    results = {
+        "runs": runs,
+        "median": {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("harness_ms", "pin_screen_ms", "main_page_ms")
+        },
+        "heavy_modules_after_pin": runs[-1]["heavy_modules_after_pin"],
+        "heavy_modules_after_main": runs[-1]["heavy_modules_after_main"],
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
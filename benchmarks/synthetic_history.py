@@ -0,0 +1,90 @@
+"""Generate a realistic multi-year workout history into a local SQLite file.
+
+    python -m benchmarks.synthetic_history --years 5 --days-per-week 4 --sqlite-path bench.db
+
+With --users N the file holds N users, "user-0" .. "user-{N-1}".
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from catalog import load_catalog
+from storage import SQLiteBackend
+
+# (sets, reps, weight) a new exercise starts from, per catalog section
+SECTION_START = {
+    "Warm up": (1, 10, 0.0),
+    "Circuit set": (2, 12, 0.0),
+    "Workout": (3, 10, 10.0),
+    "Stretch": (1, 30, 0.0),
+}
+
+
+def _next_values(values, section, rng):
+    sets, reps, weight = values
+    if section == "Workout":
+        # Slow progressive overload with the odd deload week
+        if rng.random() < 0.15:
+            weight += rng.choice([1.0, 2.5])
+        elif rng.random() < 0.03:
+            weight = max(0.0, weight - 5.0)
+        reps = max(6, min(15, reps + rng.choice([-1, 0, 0, 1])))
+    elif section == "Circuit set":
+        reps = max(8, min(20, reps + rng.choice([-1, 0, 1])))
+    return sets, reps, weight
+
+
+def generate_history(backend, user_id="default", years=3, days_per_week=4, seed=0, end=None):
+    rng = random.Random(seed)
+    end = end or date.today()
+    day = end - timedelta(days=int(365 * years))
+    workout_data = load_catalog().workouts
+    workout_types = list(workout_data)
+    last = {}
+    saves = 0
+
+    while day <= end:
+        if rng.random() < days_per_week / 7:
+            workout_type = workout_types[saves % len(workout_types)]
+            data = {}
+            for section, exercises in workout_data[workout_type].items():
+                data[section] = {}
+                for ex in exercises:
+                    start = SECTION_START.get(section, (1, 10, 0.0))
+                    last[ex] = _next_values(last.get(ex, start), section, rng)
+                    sets, reps, weight = last[ex]
+                    data[section][ex] = {"sets": sets, "reps": reps, "weight": weight}
+            backend.save_workout(user_id, day, workout_type, data)
+            saves += 1
+        day += timedelta(days=1)
+
+    return saves
+
+
+def user_ids(users):
+    # A single user keeps the app's "default" id so the benchmarks can log in
+    if users == 1:
+        return ["default"]
+    return [f"user-{i}" for i in range(users)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--days-per-week", type=float, default=4)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sqlite-path", default="bench.db")
+    args = parser.parse_args()
+
+    backend = SQLiteBackend(args.sqlite_path)
+    backend.ensure_schema()
+    for i, user_id in enumerate(user_ids(args.users)):
+        saves = generate_history(
+            backend, user_id, args.years, args.days_per_week, seed=args.seed + i
+        )
+        print(f"{args.sqlite_path} {user_id}: {saves} workouts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+
+# =========================
+# Versioned Query Cache
+# =========================
+# Entries remember the version of every tag they depend on (a user's
+# exercise, week or month). Writes bump those versions, which invalidates exactly the
+# entries that read the changed data; TTL covers writes from other
+# processes. Least recently used entries are evicted past max_entries.
+
+
+class VersionedCache:
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _snapshot(self, tags):
+        return tuple(self._versions[tag] for tag in tags)
+
+    def get_or_load(self, key, tags, loader):
+        tags = tuple(tags)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                expires, versions, value = entry
+                if expires > now and versions == self._snapshot(tags):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            # Taken before loading: a write that lands mid-load leaves
+            # this entry already stale instead of caching old data
+            versions = self._snapshot(tags)
+
+        value = loader()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def exercise_tag(user_id, exercise):
+    return ("exercise", user_id, exercise)
+
+
+def week_tag(user_id, day):
+    return ("week", user_id, str(week_start(day)))
+
+
+def month_tag(user_id, day):
+    return ("month", user_id, str(day.replace(day=1)))
+
+
+def period_tags(user_id, grain, start_date, end_date):
+    # Every week (or month, for the month grain) a date range touches
+    tags = []
+    if grain == "month":
+        day = start_date.replace(day=1)
+        while day <= end_date:
+            tags.append(month_tag(user_id, day))
+            day = (day + timedelta(days=32)).replace(day=1)
+    else:
+        day = week_start(start_date)
+        while day <= end_date:
+            tags.append(week_tag(user_id, day))
+            day += timedelta(days=7)
+    return tags
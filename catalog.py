@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+from assets import get_manifest, poster_path, slugify, video_path
+
+# =========================
+# Workout Catalog
+# =========================
+# Workout types, their sections and exercises live in catalog.json. The
+# file is parsed, validated and indexed once per change, not per rerun;
+# edits are picked up on the next rerun without restarting the server.
+CATALOG_PATH = Path(__file__).with_name("catalog.json")
+CATALOG_VERSION = 1
+# The app treats "Workout" specially (open by default, saved as prefilled),
+# so a misspelt section would quietly lose that
+SECTIONS = ("Warm up", "Circuit set", "Workout", "Stretch")
+
+
+class Catalog:
+    def __init__(self, workouts, manifest):
+        # {workout_type: {section: [exercise, ...]}}
+        self.workouts = workouts
+        # Workout type -> every exercise in page order; the types double
+        # as muscle groups
+        self.exercises = {
+            workout_type: tuple(ex for exercises in sections.values() for ex in exercises)
+            for workout_type, sections in workouts.items()
+        }
+        # Exercise -> (video, poster) paths, resolved through the asset slug
+        self.media = {}
+        for ex in {ex for exercises in self.exercises.values() for ex in exercises}:
+            asset = manifest.get(slugify(ex))
+            self.media[ex] = (video_path(asset), poster_path(asset))
+
+    def video(self, exercise):
+        return self.media.get(exercise, (None, None))[0]
+
+    def poster(self, exercise):
+        return self.media.get(exercise, (None, None))[1]
+
+
+def validate(data):
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+        raise ValueError(f"expected catalog version {CATALOG_VERSION}")
+    workouts = data.get("workouts")
+    if not isinstance(workouts, dict) or not workouts:
+        raise ValueError("'workouts' must map workout types to sections")
+
+    for workout_type, sections in workouts.items():
+        if not isinstance(sections, dict) or not sections:
+            raise ValueError(f"{workout_type}: must map sections to exercise lists")
+        seen = set()
+        for section, exercises in sections.items():
+            if section not in SECTIONS:
+                raise ValueError(
+                    f"{workout_type}: unknown section '{section}' (use {', '.join(SECTIONS)})"
+                )
+            if not isinstance(exercises, list):
+                raise ValueError(f"{workout_type} / {section}: must be a list")
+            for ex in exercises:
+                if not isinstance(ex, str) or not ex.strip():
+                    raise ValueError(f"{workout_type} / {section}: empty exercise name")
+                # Rows are keyed by (date, workout type, exercise)
+                if ex in seen:
+                    raise ValueError(f"{workout_type}: '{ex}' is listed twice")
+                seen.add(ex)
+    return workouts
+
+
+def load_catalog(path=CATALOG_PATH, manifest=None):
+    with open(path, encoding="utf-8") as f:
+        workouts = validate(json.load(f))
+    return Catalog(workouts, {} if manifest is None else manifest)
+
+
+class CatalogStore:
+    # Holds the current Catalog and reloads it when the file's mtime moves.
+    # A file that fails to load leaves the previous catalog in place.
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.error = None
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._catalog = load_catalog(path, get_manifest())
+
+    def current(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        self._catalog = load_catalog(self.path, get_manifest())
+                        self.error = None
+                    except (OSError, ValueError) as exc:
+                        self.error = f"{self.path.name}: {exc}"
+                    self._mtime = mtime
+        return self._catalog
+
+
+@st.cache_resource
+def get_catalog_store():
+    return CatalogStore()
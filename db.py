@@ -0,0 +1,187 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import streamlit as st
+from psycopg2 import pool
+
+from instrumentation import timed_pg_cursor
+
+# =========================
+# Connection Pool
+# =========================
+# Connections idle longer than this get a "SELECT 1" before reuse
+HEALTH_CHECK_INTERVAL = 30
+# How long a borrower waits for a free connection before giving up
+POOL_WAIT_TIMEOUT = 10
+
+_last_used = {}
+
+
+class WaitingConnectionPool(pool.ThreadedConnectionPool):
+    # getconn() blocks until a connection is free instead of raising
+    # PoolError, so concurrent reruns (and fetch_all's reader threads)
+    # queue for the pool rather than crash
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=POOL_WAIT_TIMEOUT):
+            raise pool.PoolError(f"no connection free after {POOL_WAIT_TIMEOUT}s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+def _make_pool(cfg, minconn):
+    return WaitingConnectionPool(
+        minconn=minconn,
+        maxconn=int(cfg.get("pool_max", 5)),
+        host=cfg["host"],
+        port=cfg["port"],
+        dbname=cfg["dbname"],
+        user=cfg["user"],
+        password=cfg["password"],
+        sslmode=cfg.get("sslmode", "require"),
+        connect_timeout=10,
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=3,
+        cursor_factory=timed_pg_cursor()
+    )
+
+
+@st.cache_resource
+def get_pool():
+    # One pool per server process, shared by every session and rerun
+    cfg = st.secrets["database"]
+    return _make_pool(cfg, int(cfg.get("pool_min", 1)))
+
+
+@st.cache_resource
+def get_replica_pools():
+    # [[database.replicas]] entries override the primary's settings (usually
+    # just host and port). Replica connections open on first use, so a
+    # replica that is down doesn't stop the app from starting.
+    cfg = st.secrets["database"]
+    return [_make_pool({**cfg, **replica}, 0) for replica in cfg.get("replicas", [])]
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout(db_pool):
+    # Drop stale or broken connections; the pool opens fresh ones on demand
+    for _ in range(db_pool.maxconn + 1):
+        conn = db_pool.getconn()
+        if _is_healthy(conn):
+            return conn
+        _last_used.pop(id(conn), None)
+        db_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("No healthy database connection available")
+
+
+@contextmanager
+def _borrowed(db_pool, conn, name):
+    broken = False
+    try:
+        with conn.cursor(name) as cur:
+            yield cur
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if broken or conn.closed:
+            _last_used.pop(id(conn), None)
+            db_pool.putconn(conn, close=True)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+            db_pool.putconn(conn)
+
+
+@contextmanager
+def get_cursor(name=None):
+    # Borrow a primary connection for one operation: commit on success, roll
+    # back on error. A named cursor is server-side and fetches rows in
+    # batches of itersize.
+    db_pool = get_pool()
+    with _borrowed(db_pool, _checkout(db_pool), name) as cur:
+        yield cur
+
+
+# =========================
+# Read Replicas
+# =========================
+# Read-only queries go to a random replica, except for a user who saved in
+# the last sticky_seconds: they stay on the primary, so they see their own
+# write before it has replayed on the replicas. A replica that can't be
+# reached is skipped for REPLICA_RETRY_INTERVAL and its reads fall back to
+# the primary.
+REPLICA_RETRY_INTERVAL = 30
+
+_last_write = {}
+_replica_down_until = {}
+
+
+def note_write(key):
+    _last_write[key] = time.monotonic()
+
+
+def _replica_pool(key):
+    pools = get_replica_pools()
+    if not pools:
+        return None
+    now = time.monotonic()
+    sticky = float(st.secrets["database"].get("sticky_seconds", 5))
+    if key in _last_write and now - _last_write[key] < sticky:
+        return None
+    live = [p for p in pools if _replica_down_until.get(id(p), 0) <= now]
+    return random.choice(live) if live else None
+
+
+@contextmanager
+def read_cursor(key, name=None):
+    # get_cursor() for read-only queries; key identifies whose writes the
+    # reader must see (the user_id)
+    db_pool = _replica_pool(key)
+    conn = None
+    if db_pool is not None:
+        try:
+            conn = _checkout(db_pool)
+        except psycopg2.OperationalError:
+            _replica_down_until[id(db_pool)] = time.monotonic() + REPLICA_RETRY_INTERVAL
+        except pool.PoolError:
+            # Busy, not down: this read goes to the primary
+            pass
+    if conn is None:
+        db_pool = get_pool()
+        conn = _checkout(db_pool)
+    with _borrowed(db_pool, conn, name) as cur:
+        yield cur
@@ -0,0 +1,232 @@
+import functools
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# =========================
+# Per-rerun Tracing
+# =========================
+# Each script run gets a RerunTrace; backends report every statement to
+# whichever trace is current on the executing thread. A fragment rerun
+# skips the top of the script, so traced_fragment() gives it its own.
+HISTORY_SIZE = 20
+
+_current = ContextVar("rerun_trace", default=None)
+_export_lock = threading.Lock()
+
+
+class RerunTrace:
+    def __init__(self, fragment=None):
+        self.fragment = fragment
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.queries = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start_ms": (start - self._start) * 1000,
+                    "duration_ms": (time.perf_counter() - start) * 1000,
+                })
+
+    def record_query(self, sql, duration_ms):
+        with self._lock:
+            self.queries.append({
+                "sql": " ".join(sql.split())[:120],
+                "duration_ms": duration_ms,
+            })
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self):
+        return {
+            "fragment": self.fragment,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "query_count": len(self.queries),
+            "query_ms": sum(q["duration_ms"] for q in self.queries),
+            "spans": self.spans,
+            "queries": self.queries,
+        }
+
+
+def start_rerun(fragment=None):
+    trace = RerunTrace(fragment)
+    _current.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def record_query(sql, start):
+    trace = _current.get()
+    if trace is not None:
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        trace.record_query(str(sql), (time.perf_counter() - start) * 1000)
+
+
+def finish_rerun():
+    trace = _current.get()
+    if trace is None:
+        return None
+    trace.finish()
+    record = trace.to_dict()
+
+    history = st.session_state.setdefault("rerun_traces", [])
+    history.append(record)
+    del history[:-HISTORY_SIZE]
+
+    path = st.secrets.get("instrumentation", {}).get("jsonl_path")
+    if path:
+        with _export_lock, open(path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    return record
+
+
+def _fragment_rerun():
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def traced_fragment(func=None, *, run_every=None):
+    # st.fragment whose own reruns are traced like full script runs; when
+    # it renders as part of a full run it is a span of that run's trace
+    def decorate(func):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            if not _fragment_rerun():
+                with span(func.__name__):
+                    return func(*args, **kwargs)
+            start_rerun(func.__name__)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_rerun()
+        return st.fragment(body, run_every=run_every)
+
+    return decorate(func) if func is not None else decorate
+
+
+# =========================
+# Timed Cursors
+# =========================
+class TimedSQLiteConnection(sqlite3.Connection):
+    def execute(self, sql, *args):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            record_query(sql, start)
+
+    def executemany(self, sql, *args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            record_query(sql, start)
+
+
+def timed_pg_cursor():
+    # psycopg2 is optional (SQLite-only installs), so build the class lazily
+    from psycopg2.extensions import cursor
+
+    class TimedCursor(cursor):
+        def execute(self, sql, args=None):
+            start = time.perf_counter()
+            try:
+                return super().execute(sql, args)
+            finally:
+                record_query(sql, start)
+
+        def executemany(self, sql, args_seq):
+            start = time.perf_counter()
+            try:
+                return super().executemany(sql, args_seq)
+            finally:
+                record_query(sql, start)
+
+    return TimedCursor
+
+
+# =========================
+# Debug Panel
+# =========================
+def render_debug_panel():
+    # Hidden unless the page is opened with ?debug=1
+    if st.query_params.get("debug") != "1":
+        return
+
+    history = st.session_state.get("rerun_traces", [])
+    with st.expander("🛠 Rerun profile", expanded=False):
+        if not history:
+            st.caption("No completed reruns yet")
+            return
+
+        full_runs = [r for r in history if not r.get("fragment")]
+        last = full_runs[-1] if full_runs else history[-1]
+        st.markdown(
+            f"**Last rerun:** {last['duration_ms']:.1f} ms, "
+            f"{last['query_count']} queries ({last['query_ms']:.1f} ms in DB)"
+        )
+        st.dataframe(
+            [
+                {"Phase": s["name"], "ms": round(s["duration_ms"], 1)}
+                for s in last["spans"]
+            ],
+            use_container_width=True
+        )
+        st.dataframe(
+            [
+                {"Query": q["sql"], "ms": round(q["duration_ms"], 1)}
+                for q in last["queries"]
+            ],
+            use_container_width=True
+        )
+        fragments = [r for r in history if r.get("fragment")]
+        if fragments:
+            st.caption("Recent fragment reruns")
+            st.dataframe(
+                [
+                    {"Fragment": r["fragment"], "ms": round(r["duration_ms"], 1),
+                     "Queries": r["query_count"]}
+                    for r in fragments
+                ],
+                use_container_width=True
+            )
+        st.download_button(
+            "Export JSON lines",
+            "\n".join(json.dumps(r, default=str) for r in history),
+            file_name="rerun_traces.jsonl",
+            mime="application/json"
+        )
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+
+from instrumentation import TimedSQLiteConnection
+
+# =========================
+# Write-behind Journal
+# =========================
+# Saves land in a local SQLite file first and are flushed to the primary
+# backend by a background worker. A journal entry is removed only after
+# the primary commits it; replaying an entry is harmless because
+# save_workout is an upsert.
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+
+
+class Journal:
+    def __init__(self, path):
+        self._conn = TimedSQLiteConnection(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_saves (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL DEFAULT 'default',
+                    workout_date TEXT NOT NULL,
+                    workout_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    queued_at REAL NOT NULL
+                )
+            """)
+            # Journals written before saves were per user
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pending_saves)")}
+            if "user_id" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE pending_saves ADD COLUMN user_id TEXT NOT NULL DEFAULT 'default'"
+                )
+
+    def append(self, user_id, workout_date, workout_type, data):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO pending_saves "
+                "(user_id, workout_date, workout_type, payload, queued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, str(workout_date), workout_type, json.dumps(data), time.time())
+            )
+
+    def pending(self, user_id=None, limit=None):
+        # [(id, user_id, workout_date, workout_type, data)] oldest first,
+        # for one user or for everyone
+        sql = "SELECT id, user_id, workout_date, workout_type, payload FROM pending_saves"
+        params = ()
+        if user_id is not None:
+            sql += " WHERE user_id = ?"
+            params = (user_id,)
+        sql += " ORDER BY id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(r[0], r[1], r[2], r[3], json.loads(r[4])) for r in rows]
+
+    def remove(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM pending_saves WHERE id = ?", [(i,) for i in ids]
+            )
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_saves").fetchone()[0]
+
+
+class SyncWorker:
+    def __init__(self, journal, target, batch_size=50):
+        self.journal = journal
+        self.target = target
+        self.batch_size = batch_size
+        # Called with (user_id, workout_date, data) after each flushed save,
+        # e.g. to drop cached reads that didn't include it yet
+        self.on_flush = None
+        self.last_error = None
+        self.last_sync = None
+        # The last save the target refused outright, as "date: reason"
+        self.rejected = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def flush(self):
+        batch = self.journal.pending(limit=self.batch_size)
+        if not batch:
+            return 0
+
+        # Later saves of the same workout win; each workout is sent once
+        merged = {}
+        for entry_id, user_id, workout_date, workout_type, data in batch:
+            ids, combined = merged.setdefault(
+                (user_id, workout_date, workout_type), ([], {})
+            )
+            ids.append(entry_id)
+            for section, exercises in data.items():
+                combined.setdefault(section, {}).update(exercises)
+
+        for (user_id, workout_date, workout_type), (ids, data) in merged.items():
+            try:
+                self.target.save_workout(user_id, workout_date, workout_type, data)
+            except ValueError as exc:
+                # Retrying can't help (e.g. its month was archived since);
+                # drop it instead of blocking the saves queued behind it
+                self.journal.remove(ids)
+                self.rejected = f"{workout_date}: {exc}"
+                continue
+            self.journal.remove(ids)
+            if self.on_flush is not None:
+                self.on_flush(user_id, workout_date, data)
+
+        self.last_sync = time.time()
+        return len(batch)
+
+    def _run(self):
+        backoff = MIN_BACKOFF
+        while True:
+            try:
+                while self.flush():
+                    pass
+                self.last_error = None
+                backoff = MIN_BACKOFF
+                self._wake.wait()
+                self._wake.clear()
+            except Exception as exc:
+                self.last_error = str(exc)
+                self._wake.wait(backoff)
+                self._wake.clear()
+                backoff = min(backoff * 2, MAX_BACKOFF)
@@ -0,0 +1,140 @@
+"""Maintenance commands for the configured storage backend.
+
+    python manage.py rebuild-rollups
+    python manage.py rebuild-records --user default
+    python manage.py export history.parquet --user default --columns workout_date exercise weight
+    python manage.py import history.csv --user default
+    python manage.py archive --horizon-days 730
+
+--sqlite-path runs a command against that SQLite file instead of the
+configured backend, e.g. to move history between SQLite and Postgres;
+add --archive-path to include (or archive to) that directory. Otherwise
+the archive comes from the [archive] section of the secrets.
+"""
+import argparse
+import time
+
+import streamlit as st
+
+from storage import ArchiveBackend, HISTORY_COLUMNS, SQLiteBackend, get_backend
+
+
+def _backend(args):
+    if args.sqlite_path:
+        backend = SQLiteBackend(args.sqlite_path)
+        backend.ensure_schema()
+        if args.archive_path:
+            from archive import Archive
+
+            backend = ArchiveBackend(backend, Archive(args.archive_path))
+        return backend
+    return get_backend()
+
+
+def _archive_settings(args):
+    # (Archive, horizon in days). Archiving into a directory the app
+    # doesn't read would hide those rows, so the secrets must enable it.
+    from archive import DEFAULT_HORIZON_DAYS, Archive
+
+    try:
+        cfg = st.secrets.get("archive", {})
+    except FileNotFoundError:
+        cfg = {}
+    horizon = args.horizon_days or int(cfg.get("horizon_days", DEFAULT_HORIZON_DAYS))
+    if args.archive_path:
+        return Archive(args.archive_path), horizon
+    if not cfg.get("enabled", False):
+        raise ValueError("set [archive] enabled = true in the secrets or pass --archive-path")
+    return Archive(cfg.get("path", "archive")), horizon
+
+
+def rebuild_rollups(args):
+    backend = _backend(args)
+    backend.rebuild_rollups(args.user)
+    print(f"Rebuilt day/week/month rollups ({backend.name})")
+
+
+def rebuild_records(args):
+    backend = _backend(args)
+    start = time.perf_counter()
+    backend.rebuild_records(args.user)
+    print(f"Rebuilt personal records in {time.perf_counter() - start:.1f}s ({backend.name})")
+
+
+def archive_history(args):
+    from archive import archive_cutoff, archive_history
+
+    archive, horizon = _archive_settings(args)
+    backend = _backend(args)
+    before = archive_cutoff(horizon)
+    start = time.perf_counter()
+    total = 0
+    for user_id in [args.user] if args.user else backend.get_user_ids():
+        moved = archive_history(backend, archive, user_id, before)
+        total += moved
+        if moved:
+            print(f"{user_id}: archived {moved} rows")
+    print(
+        f"Archived {total} rows dated before {before} to {archive.root} "
+        f"in {time.perf_counter() - start:.1f}s ({backend.name})"
+    )
+
+
+def export_history(args):
+    from transfer import export_history, format_for
+
+    backend = _backend(args)
+    start = time.perf_counter()
+    with open(args.path, "wb") as out:
+        export_history(backend, args.user or "default", out, format_for(args.path), args.columns)
+    print(f"Exported to {args.path} in {time.perf_counter() - start:.1f}s ({backend.name})")
+
+
+def import_history(args):
+    from transfer import format_for, import_history
+
+    backend = _backend(args)
+    start = time.perf_counter()
+    with open(args.path, "rb") as file:
+        report = import_history(backend, args.user or "default", file, format_for(args.path))
+    for error in report["errors"]:
+        print(error)
+    print(
+        f"Imported {report['inserted']} rows in {time.perf_counter() - start:.1f}s "
+        f"({report['duplicates']} already present, {report['archived']} in archived history, "
+        f"{report['invalid']} invalid; {backend.name})"
+    )
+
+
+COMMANDS = {
+    "rebuild-rollups": rebuild_rollups,
+    "rebuild-records": rebuild_records,
+    "export": export_history,
+    "import": import_history,
+    "archive": archive_history,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("path", nargs="?", help="file for export/import (.csv or .parquet)")
+    parser.add_argument("--user", help="user id (default: all users for rebuild-* and "
+                                       "archive, \"default\" for export/import)")
+    parser.add_argument("--columns", nargs="+", default=list(HISTORY_COLUMNS),
+                        choices=HISTORY_COLUMNS, help="columns to export")
+    parser.add_argument("--sqlite-path")
+    parser.add_argument("--archive-path", help="archive directory (default: from the secrets)")
+    parser.add_argument("--horizon-days", type=int,
+                        help="archive rows older than this, in whole months (default: 730)")
+    args = parser.parse_args()
+    if args.command in ("export", "import") and not args.path:
+        parser.error(f"{args.command} needs a file path")
+    try:
+        COMMANDS[args.command](args)
+    except ValueError as exc:
+        parser.exit(1, f"{args.command} failed: {exc}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,866 @@
+import json
+import sys
+from datetime import date
+
+# =========================
+# Set Volume
+# =========================
+# Rows logged set by set keep each set's reps and weight in set_reps and
+# set_weights (int/real arrays on Postgres, JSON arrays on SQLite); sets,
+# reps and weight then hold the set count and the top set. Their volume is
+# the sum over the sets, read straight from the arrays; other rows keep
+# sets x reps x weight.
+PG_SET_VOLUME = """
+    CASE WHEN set_reps IS NULL THEN sets * reps * weight::double precision
+         ELSE (SELECT SUM(v.reps * v.weight::double precision)
+               FROM unnest(set_reps, set_weights) AS v(reps, weight)) END
+"""
+
+SQLITE_SET_VOLUME = """
+    CASE WHEN set_reps IS NULL THEN sets * reps * weight
+         ELSE (SELECT SUM(sr.value * sw.value)
+               FROM json_each(set_reps) sr JOIN json_each(set_weights) sw ON sw.key = sr.key) END
+"""
+
+# =========================
+# Rollups
+# =========================
+# Day/week/month aggregates per user and workout type, recomputed from
+# scratch by the backends' rebuild_rollups(). A NULL user_id rebuilds
+# every user.
+#
+# Rows dated before a user's archived_history.archived_before have moved to
+# the Parquet archive (archive.py). Periods starting before that date were
+# aggregated while those rows were still here, so rebuilds and save-time
+# refreshes leave them as they are. Those ending before it never change
+# again; the week the boundary cuts through still takes saves on its later
+# days, which adjust its rollup by difference (storage.spanning_periods).
+PG_ROLLUP_REBUILD = """
+    DELETE FROM workout_rollups
+    WHERE (%(user_id)s IS NULL OR user_id = %(user_id)s)
+      AND NOT EXISTS (
+          SELECT 1 FROM archived_history a
+          WHERE a.user_id = workout_rollups.user_id
+            AND workout_rollups.period_start < a.archived_before
+      );
+
+    INSERT INTO workout_rollups
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT w.user_id, p.grain, p.period_start, w.workout_type,
+           COUNT(DISTINCT w.exercise), SUM(w.sets), SUM(w.reps),
+           SUM({volume})
+    FROM workouts w
+    CROSS JOIN LATERAL (VALUES
+        ('day', w.workout_date),
+        ('week', date_trunc('week', w.workout_date)::date),
+        ('month', date_trunc('month', w.workout_date)::date)
+    ) AS p(grain, period_start)
+    WHERE (%(user_id)s IS NULL OR w.user_id = %(user_id)s)
+      AND NOT EXISTS (
+          SELECT 1 FROM archived_history a
+          WHERE a.user_id = w.user_id AND p.period_start < a.archived_before
+      )
+    GROUP BY w.user_id, p.grain, p.period_start, w.workout_type;
+""".format(volume=PG_SET_VOLUME)
+
+SQLITE_ROLLUP_REBUILD = [
+    """
+    DELETE FROM workout_rollups
+    WHERE (:user_id IS NULL OR user_id = :user_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM archived_history a
+          WHERE a.user_id = workout_rollups.user_id
+            AND workout_rollups.period_start < a.archived_before
+      )
+    """,
+    """
+    INSERT INTO workout_rollups
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT user_id, grain, period_start, workout_type,
+           COUNT(DISTINCT exercise), SUM(sets), SUM(reps),
+           SUM({volume})
+    FROM (
+        SELECT 'day' AS grain, workout_date AS period_start, * FROM workouts
+        UNION ALL
+        SELECT 'week', date(workout_date, '-' || ((CAST(strftime('%w', workout_date) AS INTEGER) + 6) % 7) || ' days'), *
+        FROM workouts
+        UNION ALL
+        SELECT 'month', strftime('%Y-%m-01', workout_date), * FROM workouts
+    ) p
+    WHERE (:user_id IS NULL OR user_id = :user_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM archived_history a
+          WHERE a.user_id = p.user_id AND p.period_start < a.archived_before
+      )
+    GROUP BY user_id, grain, period_start, workout_type
+    """.format(volume=SQLITE_SET_VOLUME),
+]
+
+# =========================
+# Personal Records
+# =========================
+# Best weight, best session volume and most reps at each weight, per user
+# and exercise; rows logged set by set count each set toward reps at its
+# own weight. previous is the best value logged before the record's date,
+# NULL when it was the first. Rows without sets or reps don't count, and
+# bodyweight rows only count toward reps.
+#
+# archived_records holds the same per-key bests computed over archived rows
+# only, so rebuilds rank it together with the rows still in workouts and
+# get the result a full-history rebuild would.
+_PG_RECORDS_RANKED = """
+    SELECT user_id, exercise, record, at_weight, value, workout_date,
+           GREATEST(own_previous, MAX(value) OVER (
+               best ORDER BY workout_date
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           )) AS previous,
+           ROW_NUMBER() OVER (best ORDER BY value DESC, workout_date) AS rank
+    FROM (
+        SELECT user_id, exercise, record, at_weight, value,
+               previous AS own_previous, workout_date
+        FROM archived_records
+        WHERE {user_filter}
+        UNION ALL
+        SELECT w.user_id, w.exercise, r.record, r.at_weight, r.value,
+               NULL, w.workout_date
+        FROM workouts w
+        CROSS JOIN LATERAL (
+            VALUES ('weight', 0::real, w.weight::double precision),
+                   ('volume', 0::real, {volume})
+            UNION ALL
+            SELECT 'reps', s.weight, s.reps::double precision
+            FROM unnest(COALESCE(w.set_weights, ARRAY[w.weight]),
+                        COALESCE(w.set_reps, ARRAY[w.reps])) AS s(weight, reps)
+            WHERE s.reps > 0
+        ) AS r(record, at_weight, value)
+        WHERE ({user_filter}) AND {row_filter}
+          AND w.sets > 0 AND w.reps > 0 AND (r.record = 'reps' OR w.weight > 0)
+    ) candidates
+    WINDOW best AS (PARTITION BY user_id, exercise, record, at_weight)
+"""
+
+_SQLITE_RECORDS_RANKED = """
+    SELECT user_id, exercise, record, at_weight, value, workout_date,
+           CASE WHEN own_previous IS NULL THEN prior
+                WHEN prior IS NULL THEN own_previous
+                ELSE max(own_previous, prior) END AS previous,
+           rank
+    FROM (
+        SELECT *,
+               MAX(value) OVER (
+                   best ORDER BY workout_date
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS prior,
+               ROW_NUMBER() OVER (best ORDER BY value DESC, workout_date) AS rank
+        FROM (
+            SELECT user_id, exercise, record, at_weight, value,
+                   previous AS own_previous, workout_date
+            FROM archived_records
+            WHERE {user_filter}
+            UNION ALL
+            SELECT user_id, exercise, 'weight', 0, weight, NULL, workout_date
+            FROM workouts
+            WHERE ({user_filter}) AND {row_filter}
+              AND weight > 0 AND sets > 0 AND reps > 0
+            UNION ALL
+            SELECT user_id, exercise, 'reps', weight, reps, NULL, workout_date
+            FROM workouts
+            WHERE ({user_filter}) AND {row_filter}
+              AND sets > 0 AND reps > 0 AND set_reps IS NULL
+            UNION ALL
+            SELECT user_id, exercise, 'reps', sw.value, sr.value, NULL, workout_date
+            FROM workouts, json_each(set_reps) sr
+            JOIN json_each(set_weights) sw ON sw.key = sr.key
+            WHERE ({user_filter}) AND {row_filter}
+              AND sets > 0 AND reps > 0 AND sr.value > 0
+            UNION ALL
+            SELECT user_id, exercise, 'volume', 0, {volume}, NULL, workout_date
+            FROM workouts
+            WHERE ({user_filter}) AND {row_filter}
+              AND weight > 0 AND sets > 0 AND reps > 0
+        )
+        WINDOW best AS (PARTITION BY user_id, exercise, record, at_weight)
+    )
+"""
+
+PG_RECORDS_REBUILD = """
+    DELETE FROM personal_records
+    WHERE %(user_id)s IS NULL OR user_id = %(user_id)s;
+
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked}) ranked
+    WHERE rank = 1;
+""".format(ranked=_PG_RECORDS_RANKED.format(
+    user_filter="%(user_id)s IS NULL OR user_id = %(user_id)s", row_filter="TRUE",
+    volume=PG_SET_VOLUME
+))
+
+SQLITE_RECORDS_REBUILD = [
+    """
+    DELETE FROM personal_records
+    WHERE :user_id IS NULL OR user_id = :user_id
+    """,
+    """
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked})
+    WHERE rank = 1
+    """.format(ranked=_SQLITE_RECORDS_RANKED.format(
+        user_filter=":user_id IS NULL OR user_id = :user_id", row_filter="1",
+        volume=SQLITE_SET_VOLUME
+    )),
+]
+
+# Recomputes one user's records for some exercises from scratch, for saves
+# that may have lowered or removed the value a record came from
+PG_RECORDS_RECOMPUTE = """
+    DELETE FROM personal_records
+    WHERE user_id = %(user_id)s AND exercise = ANY(%(exercises)s);
+
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked}) ranked
+    WHERE rank = 1;
+""".format(ranked=_PG_RECORDS_RANKED.format(
+    user_filter="user_id = %(user_id)s AND exercise = ANY(%(exercises)s)", row_filter="TRUE",
+    volume=PG_SET_VOLUME
+))
+
+SQLITE_RECORDS_RECOMPUTE = [
+    """
+    DELETE FROM personal_records
+    WHERE user_id = :user_id AND exercise IN (SELECT value FROM json_each(:exercises))
+    """,
+    """
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked})
+    WHERE rank = 1
+    """.format(ranked=_SQLITE_RECORDS_RANKED.format(
+        user_filter="user_id = :user_id AND exercise IN (SELECT value FROM json_each(:exercises))",
+        row_filter="1", volume=SQLITE_SET_VOLUME
+    )),
+]
+
+# Folds the rows about to be archived (dated before `before`, written up
+# to `newest`) into one user's archived_records
+PG_RECORDS_ARCHIVE = """
+    INSERT INTO archived_records AS ar
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked}) ranked
+    WHERE rank = 1
+    ON CONFLICT (user_id, exercise, record, at_weight) DO UPDATE
+    SET value = EXCLUDED.value,
+        previous = EXCLUDED.previous,
+        workout_date = EXCLUDED.workout_date;
+""".format(ranked=_PG_RECORDS_RANKED.format(
+    user_filter="user_id = %(user_id)s",
+    row_filter="w.workout_date < %(before)s AND w.created_at <= %(newest)s",
+    volume=PG_SET_VOLUME
+))
+
+SQLITE_RECORDS_ARCHIVE = """
+    INSERT INTO archived_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM ({ranked})
+    WHERE rank = 1
+    ON CONFLICT (user_id, exercise, record, at_weight) DO UPDATE
+    SET value = excluded.value,
+        previous = excluded.previous,
+        workout_date = excluded.workout_date
+""".format(ranked=_SQLITE_RECORDS_RANKED.format(
+    user_filter="user_id = :user_id",
+    row_filter="workout_date < :before AND created_at <= :newest",
+    volume=SQLITE_SET_VOLUME
+))
+
+# Frozen backfills for migrations 4 and 6, written against the schema of
+# their time (before tenancy and before the archive boundary)
+_PG_ROLLUP_BACKFILL_V4 = """
+    DELETE FROM workout_rollups;
+
+    INSERT INTO workout_rollups
+        (grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT p.grain, p.period_start, w.workout_type,
+           COUNT(DISTINCT w.exercise), SUM(w.sets), SUM(w.reps),
+           SUM(w.sets * w.reps * w.weight)
+    FROM workouts w
+    CROSS JOIN LATERAL (VALUES
+        ('day', w.workout_date),
+        ('week', date_trunc('week', w.workout_date)::date),
+        ('month', date_trunc('month', w.workout_date)::date)
+    ) AS p(grain, period_start)
+    GROUP BY p.grain, p.period_start, w.workout_type;
+"""
+
+_SQLITE_ROLLUP_BACKFILL_V4 = """
+    DELETE FROM workout_rollups;
+
+    INSERT INTO workout_rollups
+        (grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT grain, period_start, workout_type,
+           COUNT(DISTINCT exercise), SUM(sets), SUM(reps),
+           SUM(sets * reps * weight)
+    FROM (
+        SELECT 'day' AS grain, workout_date AS period_start, * FROM workouts
+        UNION ALL
+        SELECT 'week', date(workout_date, '-' || ((CAST(strftime('%w', workout_date) AS INTEGER) + 6) % 7) || ' days'), *
+        FROM workouts
+        UNION ALL
+        SELECT 'month', strftime('%Y-%m-01', workout_date), * FROM workouts
+    )
+    GROUP BY grain, period_start, workout_type;
+"""
+
+_PG_RECORDS_BACKFILL_V6 = """
+    DELETE FROM personal_records;
+
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM (
+        SELECT w.user_id, w.exercise, r.record, r.at_weight, r.value, w.workout_date,
+               ROW_NUMBER() OVER (best ORDER BY r.value DESC, w.workout_date) AS rank,
+               MAX(r.value) OVER (
+                   best ORDER BY w.workout_date
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS previous
+        FROM workouts w
+        CROSS JOIN LATERAL (VALUES
+            ('weight', 0::real, w.weight::double precision),
+            ('reps', w.weight, w.reps::double precision),
+            ('volume', 0::real, w.sets * w.reps * w.weight::double precision)
+        ) AS r(record, at_weight, value)
+        WHERE w.sets > 0 AND w.reps > 0 AND (r.record = 'reps' OR w.weight > 0)
+        WINDOW best AS (PARTITION BY w.user_id, w.exercise, r.record, r.at_weight)
+    ) ranked
+    WHERE rank = 1;
+"""
+
+_SQLITE_RECORDS_BACKFILL_V6 = """
+    DELETE FROM personal_records;
+
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, previous, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, previous, workout_date
+    FROM (
+        SELECT user_id, exercise, record, at_weight, value, workout_date,
+               ROW_NUMBER() OVER (best ORDER BY value DESC, workout_date) AS rank,
+               MAX(value) OVER (
+                   best ORDER BY workout_date
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS previous
+        FROM (
+            SELECT user_id, exercise, 'weight' AS record, 0 AS at_weight,
+                   weight AS value, workout_date
+            FROM workouts WHERE weight > 0 AND sets > 0 AND reps > 0
+            UNION ALL
+            SELECT user_id, exercise, 'reps', weight, reps, workout_date
+            FROM workouts WHERE sets > 0 AND reps > 0
+            UNION ALL
+            SELECT user_id, exercise, 'volume', 0, sets * reps * weight, workout_date
+            FROM workouts WHERE weight > 0 AND sets > 0 AND reps > 0
+        )
+        WINDOW best AS (PARTITION BY user_id, exercise, record, at_weight)
+    )
+    WHERE rank = 1;
+"""
+
+# =========================
+# Schema Migrations
+# =========================
+# Append-only: each entry runs once and its version is recorded, in
+# schema_migrations on Postgres and in PRAGMA user_version on SQLite.
+WORKOUT_PARTITIONS = 8
+
+MIGRATIONS = [
+    (1, "create workouts table", """
+        CREATE TABLE IF NOT EXISTS workouts (
+            id BIGSERIAL PRIMARY KEY,
+            workout_date DATE NOT NULL,
+            workout_type TEXT NOT NULL,
+            section TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            sets INTEGER NOT NULL DEFAULT 0,
+            reps INTEGER NOT NULL DEFAULT 0,
+            weight REAL NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """),
+    (2, "covering indexes for prefill, weekly summary and save", """
+        -- Older rows were written by delete-and-reinsert; keep the newest
+        -- copy of any (date, type, exercise) before making it unique
+        DELETE FROM workouts w
+        USING workouts newer
+        WHERE w.workout_date = newer.workout_date
+          AND w.workout_type = newer.workout_type
+          AND w.exercise = newer.exercise
+          AND (w.created_at, w.ctid) < (newer.created_at, newer.ctid);
+
+        -- Upsert key for save_workout; leading workout_date also makes it
+        -- an index-only path for the weekly summary range scan
+        CREATE UNIQUE INDEX IF NOT EXISTS workouts_date_type_exercise_key
+            ON workouts (workout_date, workout_type, exercise)
+            INCLUDE (sets, reps, weight);
+
+        -- Latest values per exercise for the entry form prefill
+        CREATE INDEX IF NOT EXISTS workouts_exercise_recent_idx
+            ON workouts (exercise, workout_date DESC, created_at DESC)
+            INCLUDE (sets, reps, weight);
+    """),
+    (3, "created_at index for incremental history reads", """
+        CREATE INDEX IF NOT EXISTS workouts_created_at_idx
+            ON workouts (created_at);
+    """),
+    (4, "day/week/month rollups", """
+        CREATE TABLE IF NOT EXISTS workout_rollups (
+            grain TEXT NOT NULL,
+            period_start DATE NOT NULL,
+            workout_type TEXT NOT NULL,
+            exercises INTEGER NOT NULL,
+            sets BIGINT NOT NULL,
+            reps BIGINT NOT NULL,
+            volume DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (grain, period_start, workout_type)
+        );
+    """ + _PG_ROLLUP_BACKFILL_V4),
+    (5, "per-user rows, workouts hash-partitioned by user", """
+        -- Old indexes go first so the partitioned table can reuse names
+        DROP INDEX IF EXISTS workouts_date_type_exercise_key;
+        DROP INDEX IF EXISTS workouts_exercise_recent_idx;
+        DROP INDEX IF EXISTS workouts_created_at_idx;
+        ALTER TABLE workouts RENAME TO workouts_unpartitioned;
+
+        CREATE TABLE workouts (
+            id BIGSERIAL,
+            user_id TEXT NOT NULL DEFAULT 'default',
+            workout_date DATE NOT NULL,
+            workout_type TEXT NOT NULL,
+            section TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            sets INTEGER NOT NULL DEFAULT 0,
+            reps INTEGER NOT NULL DEFAULT 0,
+            weight REAL NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT workouts_user_pkey PRIMARY KEY (user_id, id)
+        ) PARTITION BY HASH (user_id);
+    """ + "".join(
+        f"CREATE TABLE workouts_p{i} PARTITION OF workouts "
+        f"FOR VALUES WITH (MODULUS {WORKOUT_PARTITIONS}, REMAINDER {i});\n"
+        for i in range(WORKOUT_PARTITIONS)
+    ) + """
+        -- Every hot query filters on user_id first, so it prunes to one
+        -- partition and then walks that user's slice of the index
+        CREATE UNIQUE INDEX workouts_date_type_exercise_key
+            ON workouts (user_id, workout_date, workout_type, exercise)
+            INCLUDE (sets, reps, weight);
+        CREATE INDEX workouts_exercise_recent_idx
+            ON workouts (user_id, exercise, workout_date DESC, created_at DESC)
+            INCLUDE (sets, reps, weight);
+        CREATE INDEX workouts_created_at_idx
+            ON workouts (user_id, created_at);
+
+        INSERT INTO workouts
+            (workout_date, workout_type, section, exercise, sets, reps, weight, created_at)
+        SELECT workout_date, workout_type, section, exercise, sets, reps, weight, created_at
+        FROM workouts_unpartitioned;
+        DROP TABLE workouts_unpartitioned;
+
+        ALTER TABLE workout_rollups ADD COLUMN user_id TEXT NOT NULL DEFAULT 'default';
+        ALTER TABLE workout_rollups DROP CONSTRAINT workout_rollups_pkey;
+        ALTER TABLE workout_rollups
+            ADD CONSTRAINT workout_rollups_pkey
+            PRIMARY KEY (user_id, grain, period_start, workout_type);
+    """),
+    (6, "personal records", """
+        CREATE TABLE personal_records (
+            user_id TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            record TEXT NOT NULL,
+            at_weight REAL NOT NULL,
+            value DOUBLE PRECISION NOT NULL,
+            previous DOUBLE PRECISION,
+            workout_date DATE NOT NULL,
+            PRIMARY KEY (user_id, exercise, record, at_weight)
+        );
+    """ + _PG_RECORDS_BACKFILL_V6),
+    (7, "archive boundary and archived records per user", """
+        CREATE TABLE archived_history (
+            user_id TEXT PRIMARY KEY,
+            archived_before DATE NOT NULL
+        );
+        CREATE TABLE archived_records (
+            user_id TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            record TEXT NOT NULL,
+            at_weight REAL NOT NULL,
+            value DOUBLE PRECISION NOT NULL,
+            previous DOUBLE PRECISION,
+            workout_date DATE NOT NULL,
+            PRIMARY KEY (user_id, exercise, record, at_weight)
+        );
+    """),
+    (8, "per-set reps and weights", """
+        -- NULL for rows logged as sets x reps; existing rows stay that way
+        ALTER TABLE workouts
+            ADD COLUMN set_reps INTEGER[],
+            ADD COLUMN set_weights REAL[],
+            ADD CONSTRAINT workouts_set_arrays_check
+                CHECK (cardinality(set_reps) IS NOT DISTINCT FROM cardinality(set_weights));
+    """),
+    (9, "covering indexes carry the per-set columns", """
+        -- Prefill, the saved workout and rollup refreshes read the set
+        -- arrays too, so without them every hit went back to the table.
+        -- Set lists are a few dozen bytes, far below the btree tuple limit.
+        -- Each index is built under a new name and swapped in, so the
+        -- upsert key is never missing.
+        CREATE UNIQUE INDEX workouts_date_type_exercise_key_v9
+            ON workouts (user_id, workout_date, workout_type, exercise)
+            INCLUDE (section, sets, reps, weight, set_reps, set_weights);
+        DROP INDEX workouts_date_type_exercise_key;
+        ALTER INDEX workouts_date_type_exercise_key_v9
+            RENAME TO workouts_date_type_exercise_key;
+
+        CREATE INDEX workouts_exercise_recent_idx_v9
+            ON workouts (user_id, exercise, workout_date DESC, created_at DESC)
+            INCLUDE (sets, reps, weight, set_reps, set_weights);
+        DROP INDEX workouts_exercise_recent_idx;
+        ALTER INDEX workouts_exercise_recent_idx_v9
+            RENAME TO workouts_exercise_recent_idx;
+    """),
+]
+
+# Same versions as MIGRATIONS, in SQLite's dialect. Version 1 matches the
+# table the earlier sqlite3 version of the app created, so existing
+# workouts.db files upgrade.
+SQLITE_MIGRATIONS = [
+    (1, "create workouts table", """
+        CREATE TABLE IF NOT EXISTS workouts (
+            workout_date TEXT,
+            workout_type TEXT,
+            section TEXT,
+            exercise TEXT,
+            sets INTEGER,
+            reps INTEGER,
+            weight REAL
+        );
+    """),
+    (2, "covering indexes for prefill, weekly summary and save", """
+        ALTER TABLE workouts ADD COLUMN created_at TEXT NOT NULL DEFAULT '';
+
+        DELETE FROM workouts
+        WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM workouts
+            GROUP BY workout_date, workout_type, exercise
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS workouts_date_type_exercise_key
+            ON workouts (workout_date, workout_type, exercise);
+
+        -- SQLite has no INCLUDE, so the weekly summary gets its own
+        -- covering index
+        CREATE INDEX IF NOT EXISTS workouts_week_summary_idx
+            ON workouts (workout_date, workout_type, exercise, sets, reps, weight);
+
+        CREATE INDEX IF NOT EXISTS workouts_exercise_recent_idx
+            ON workouts (exercise, workout_date DESC, created_at DESC, sets, reps, weight);
+    """),
+    (3, "created_at index for incremental history reads", """
+        CREATE INDEX IF NOT EXISTS workouts_created_at_idx
+            ON workouts (created_at);
+    """),
+    (4, "day/week/month rollups", """
+        CREATE TABLE IF NOT EXISTS workout_rollups (
+            grain TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            workout_type TEXT NOT NULL,
+            exercises INTEGER NOT NULL,
+            sets INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            volume REAL NOT NULL,
+            PRIMARY KEY (grain, period_start, workout_type)
+        ) WITHOUT ROWID;
+    """ + _SQLITE_ROLLUP_BACKFILL_V4),
+    (5, "per-user rows", """
+        ALTER TABLE workouts ADD COLUMN user_id TEXT NOT NULL DEFAULT 'default';
+
+        DROP INDEX workouts_date_type_exercise_key;
+        DROP INDEX workouts_week_summary_idx;
+        DROP INDEX workouts_exercise_recent_idx;
+        DROP INDEX workouts_created_at_idx;
+
+        CREATE UNIQUE INDEX workouts_date_type_exercise_key
+            ON workouts (user_id, workout_date, workout_type, exercise);
+        CREATE INDEX workouts_exercise_recent_idx
+            ON workouts (user_id, exercise, workout_date DESC, created_at DESC, sets, reps, weight);
+        CREATE INDEX workouts_created_at_idx
+            ON workouts (user_id, created_at);
+
+        CREATE TABLE workout_rollups_by_user (
+            user_id TEXT NOT NULL,
+            grain TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            workout_type TEXT NOT NULL,
+            exercises INTEGER NOT NULL,
+            sets INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            volume REAL NOT NULL,
+            PRIMARY KEY (user_id, grain, period_start, workout_type)
+        ) WITHOUT ROWID;
+        INSERT INTO workout_rollups_by_user
+        SELECT 'default', grain, period_start, workout_type, exercises, sets, reps, volume
+        FROM workout_rollups;
+        DROP TABLE workout_rollups;
+        ALTER TABLE workout_rollups_by_user RENAME TO workout_rollups;
+    """),
+    (6, "personal records", """
+        CREATE TABLE personal_records (
+            user_id TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            record TEXT NOT NULL,
+            at_weight REAL NOT NULL,
+            value REAL NOT NULL,
+            previous REAL,
+            workout_date TEXT NOT NULL,
+            PRIMARY KEY (user_id, exercise, record, at_weight)
+        ) WITHOUT ROWID;
+    """ + _SQLITE_RECORDS_BACKFILL_V6),
+    (7, "archive boundary and archived records per user", """
+        CREATE TABLE archived_history (
+            user_id TEXT PRIMARY KEY,
+            archived_before TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE archived_records (
+            user_id TEXT NOT NULL,
+            exercise TEXT NOT NULL,
+            record TEXT NOT NULL,
+            at_weight REAL NOT NULL,
+            value REAL NOT NULL,
+            previous REAL,
+            workout_date TEXT NOT NULL,
+            PRIMARY KEY (user_id, exercise, record, at_weight)
+        ) WITHOUT ROWID;
+    """),
+    (8, "per-set reps and weights", """
+        ALTER TABLE workouts ADD COLUMN set_reps TEXT;
+        ALTER TABLE workouts ADD COLUMN set_weights TEXT
+            CHECK (json_array_length(set_weights) IS json_array_length(set_reps));
+    """),
+    (9, "covering indexes carry the per-set columns", """
+        -- SQLite has no INCLUDE; the unique key stays as it is, since
+        -- extra columns there would change what counts as a duplicate
+        DROP INDEX workouts_exercise_recent_idx;
+        CREATE INDEX workouts_exercise_recent_idx
+            ON workouts (user_id, exercise, workout_date DESC, created_at DESC,
+                         sets, reps, weight, set_reps, set_weights);
+    """),
+]
+
+
+def migrate(cursor):
+    # Serialize concurrent app starts against the same database
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('workouts_migrate'))")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    for version, description, sql in MIGRATIONS:
+        if version in applied:
+            continue
+        cursor.execute(sql)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description)
+        )
+
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def migrate_sqlite(conn):
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for version, description, sql in SQLITE_MIGRATIONS:
+        if version <= current:
+            continue
+        # executescript commits first, so wrap each version explicitly
+        conn.executescript(
+            f"BEGIN IMMEDIATE;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;"
+        )
+        current = version
+
+    return current
+
+
+# =========================
+# Query Plan Checks
+# =========================
+# (name, query, params, index the plan must use, whether it must be an
+# Index Only Scan). Queries on workouts must also be pruned to a single
+# partition.
+HOT_QUERIES = [
+    ("prefill", """
+        SELECT DISTINCT ON (exercise) exercise, sets, reps, weight, set_reps, set_weights
+        FROM workouts
+        WHERE user_id = %s AND exercise = ANY(%s)
+        ORDER BY exercise, workout_date DESC, created_at DESC
+    """, ("default", ["Pushups", "Bench Dips"]), "workouts_exercise_recent_idx", True),
+    ("weekly summary", """
+        SELECT period_start, workout_type, exercises, sets, reps, volume
+        FROM workout_rollups
+        WHERE user_id = %s AND grain = %s AND period_start BETWEEN %s AND %s
+        ORDER BY period_start, workout_type
+    """, ("default", "day", date(2024, 1, 1), date(2024, 1, 7)), "workout_rollups_pkey", False),
+    ("rollup refresh", """
+        SELECT workout_type, COUNT(DISTINCT exercise), SUM(sets), SUM(reps),
+               SUM(""" + PG_SET_VOLUME + """)
+        FROM workouts
+        WHERE user_id = %s AND workout_date BETWEEN %s AND %s AND workout_type = %s
+        GROUP BY workout_type
+    """, ("default", date(2024, 1, 1), date(2024, 1, 31), "Legs"),
+        "workouts_date_type_exercise_key", True),
+    ("saved workout", """
+        SELECT exercise, section, sets, reps, weight, set_reps, set_weights
+        FROM workouts
+        WHERE user_id = %s AND workout_date = %s AND workout_type = %s
+    """, ("default", date(2024, 1, 1), "Legs"), "workouts_date_type_exercise_key", True),
+    ("personal records", """
+        SELECT exercise, record, at_weight, value, previous, workout_date
+        FROM personal_records
+        WHERE user_id = %s AND exercise = ANY(%s)
+    """, ("default", ["Pushups", "Bench Dips"]), "personal_records_pkey", False),
+]
+
+
+# ON CONFLICT targets used by the backends; each needs a unique index over
+# exactly these columns or the upsert fails at runtime
+UPSERT_KEYS = [
+    ("workouts", ("user_id", "workout_date", "workout_type", "exercise")),
+    ("workout_rollups", ("user_id", "grain", "period_start", "workout_type")),
+    ("personal_records", ("user_id", "exercise", "record", "at_weight")),
+    ("archived_records", ("user_id", "exercise", "record", "at_weight")),
+    ("archived_history", ("user_id",)),
+]
+
+
+def check_upsert_keys(cursor):
+    failures = []
+    for table, columns in UPSERT_KEYS:
+        cursor.execute("""
+            SELECT array_agg(a.attname::text ORDER BY k.ord)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            CROSS JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum
+            WHERE c.relname = %s AND i.indisunique AND k.ord <= i.indnkeyatts
+            GROUP BY i.indexrelid
+        """, (table,))
+        if list(columns) not in [row[0] for row in cursor.fetchall()]:
+            failures.append(f"{table}: no unique index on ({', '.join(columns)}) for ON CONFLICT")
+    return failures
+
+
+def _plan_nodes(plan, key):
+    found = set()
+    if key in plan:
+        found.add(plan[key])
+    for child in plan.get("Plans", []):
+        found |= _plan_nodes(child, key)
+    return found
+
+
+def _index_scans(plan):
+    # {(node type, index name)} for every node that reads an index
+    found = set()
+    if "Index Name" in plan:
+        found.add((plan["Node Type"], plan["Index Name"]))
+    for child in plan.get("Plans", []):
+        found |= _index_scans(child)
+    return found
+
+
+def _parent_indexes(cursor, names):
+    # Partition-level indexes are auto-named; map them to the index
+    # declared on the partitioned table
+    cursor.execute("""
+        SELECT child.relname, parent.relname
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE child.relname = ANY(%s)
+    """, (list(names),))
+    parents = dict(cursor.fetchall())
+    return {name: parents.get(name, name) for name in names}
+
+
+def check_query_plans(cursor):
+    # Seq scans are disabled so a tiny dev table still shows which index
+    # the planner would pick. Index-only plans also need the visibility
+    # map set, so run this after a VACUUM of workouts (as __main__ does).
+    failures = []
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    for name, query, params, index, index_only in HOT_QUERIES:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = _index_scans(plan[0]["Plan"])
+        parents = _parent_indexes(cursor, {scanned for _, scanned in scans})
+        used = set(parents) | set(parents.values())
+        if index not in used:
+            failures.append(
+                f"{name}: expected {index}, plan used {sorted(used) or 'no index'}"
+            )
+        kinds = {kind for kind, scanned in scans if parents[scanned] == index}
+        if index_only and kinds - {"Index Only Scan"}:
+            failures.append(
+                f"{name}: {index} read through {', '.join(sorted(kinds))}, "
+                "expected an Index Only Scan"
+            )
+        partitions = {
+            rel for rel in _plan_nodes(plan[0]["Plan"], "Relation Name")
+            if rel.startswith("workouts_p")
+        }
+        if len(partitions) > 1:
+            failures.append(f"{name}: scanned {len(partitions)} partitions, expected 1")
+    return failures
+
+
+if __name__ == "__main__":
+    from db import get_cursor
+
+    with get_cursor() as cursor:
+        print(f"Schema at version {migrate(cursor)}")
+
+    if "--check" in sys.argv:
+        with get_cursor() as cursor:
+            # VACUUM can't run in a transaction; sets the visibility map
+            # that index-only scans rely on
+            cursor.connection.autocommit = True
+            try:
+                cursor.execute("VACUUM (ANALYZE) workouts")
+            finally:
+                cursor.connection.autocommit = False
+        with get_cursor() as cursor:
+            failures = check_upsert_keys(cursor) + check_query_plans(cursor)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if failures:
+            sys.exit(1)
+        print(
+            f"OK {len(UPSERT_KEYS)} upsert keys indexed, "
+            f"{len(HOT_QUERIES)} hot queries use their indexes"
+        )
@@ -0,0 +1,1428 @@
+import contextvars
+import csv
+import heapq
+import io
+import json
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import streamlit as st
+
+from cache import (
+    VersionedCache, exercise_tag, month_tag, period_tags, week_start, week_tag
+)
+from instrumentation import TimedSQLiteConnection
+from journal import Journal, SyncWorker
+from migrations import (
+    PG_RECORDS_ARCHIVE, PG_RECORDS_REBUILD, PG_RECORDS_RECOMPUTE, PG_ROLLUP_REBUILD,
+    PG_SET_VOLUME, SQLITE_RECORDS_ARCHIVE, SQLITE_RECORDS_REBUILD,
+    SQLITE_RECORDS_RECOMPUTE, SQLITE_ROLLUP_REBUILD, SQLITE_SET_VOLUME, migrate,
+    migrate_sqlite
+)
+
+# =========================
+# Storage Backends
+# =========================
+# Selected with st.secrets["storage"]["backend"]: "postgres" (default,
+# Supabase via db.py) or "sqlite" (local file, works offline). Every data
+# method takes the signed-in user_id first and only sees that user's rows.
+
+
+class StorageBackend:
+    name = None
+
+    def ensure_schema(self):
+        raise NotImplementedError
+
+    def get_last_exercises(self, user_id, exercises):
+        # {exercise: (sets, reps, weight, set_reps, set_weights)} for the most
+        # recent log of each; the set lists are None unless logged per set
+        return {
+            ex: values for ex, (_, values) in self.get_last_dated(user_id, exercises).items()
+        }
+
+    def get_last_dated(self, user_id, exercises):
+        # {exercise: (workout_date, values)}: get_last_exercises with the day
+        # each was logged
+        raise NotImplementedError
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        # data is {section: {exercise: {"sets", "reps", "weight"}}} holding
+        # only the exercises that changed; others are left untouched. Per-set
+        # logs add "set_reps" and "set_weights" lists (see workout_values)
+        raise NotImplementedError
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        # {exercise: (section, sets, reps, weight, set_reps, set_weights)}
+        # saved for that day
+        raise NotImplementedError
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        # [(period_start, workout_type, exercises, sets, reps, volume)] for
+        # grain "day", "week" or "month", read from workout_rollups
+        raise NotImplementedError
+
+    def get_weekly_summary(self, user_id, start_date, end_date):
+        return self.get_rollups(user_id, "day", start_date, end_date)
+
+    def rebuild_rollups(self, user_id=None):
+        # One user, or every user when user_id is None
+        raise NotImplementedError
+
+    def get_personal_records(self, user_id, exercises):
+        # {exercise: {(record, at_weight): (value, previous, date)}} where
+        # record is "weight", "volume" (at_weight 0) or "reps"
+        raise NotImplementedError
+
+    def rebuild_records(self, user_id=None):
+        # One user, or every user when user_id is None
+        raise NotImplementedError
+
+    def get_history(self, user_id, since=None):
+        # HISTORY_COLUMNS rows written after `since` (a created_at value), or
+        # all rows when None. The set columns are as the backend stores them;
+        # set_list() reads either form
+        raise NotImplementedError
+
+    def iter_history(self, user_id, columns, chunk_size):
+        # Lists of up to chunk_size rows holding `columns` (a subset of
+        # HISTORY_COLUMNS), in date order, without loading the full history
+        raise NotImplementedError
+
+    def export_csv(self, user_id, columns, out):
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for chunk in self.iter_history(user_id, columns, EXPORT_CHUNK_SIZE):
+            writer.writerows(chunk)
+
+    def import_history(self, user_id, chunks):
+        # chunks of (date, workout_type, section, exercise, sets, reps, weight,
+        # set_reps, set_weights). Rows already stored for the same day, type and exercise are kept;
+        # returns the number of rows inserted
+        raise NotImplementedError
+
+    def get_user_ids(self):
+        # Every user with rows in the database
+        raise NotImplementedError
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        # Lists of up to chunk_size HISTORY_COLUMNS rows dated before
+        # `before`, in date order, read from the database only
+        raise NotImplementedError
+
+    def drop_cold_rows(self, user_id, before, newest):
+        # Deletes the rows iter_cold_rows() returned (created_at up to
+        # newest), folding them into archived_records first, and moves the
+        # user's archive boundary to `before`
+        raise NotImplementedError
+
+    def archived_before(self, user_id):
+        # The user's archive boundary: days before it are archived and
+        # can't be saved again. None when nothing is archived.
+        raise NotImplementedError
+
+    def sync_status(self):
+        # {"pending", "last_error", "last_sync", "rejected"} when saves are
+        # written behind
+        return None
+
+
+HISTORY_COLUMNS = (
+    "workout_date", "workout_type", "section", "exercise",
+    "sets", "reps", "weight", "created_at", "set_reps", "set_weights",
+)
+EXPORT_CHUNK_SIZE = 10_000
+
+
+def _column_list(columns):
+    # Column names are interpolated into SQL, so only known ones pass
+    unknown = set(columns) - set(HISTORY_COLUMNS)
+    if unknown or not columns:
+        raise ValueError(f"Unknown history columns: {sorted(unknown) or 'none given'}")
+    return ", ".join(columns)
+
+
+def rollup_periods(workout_date):
+    # Flat (grain, start, end) triples for the periods one day belongs to
+    day = _as_date(workout_date)
+    week = week_start(day)
+    month = day.replace(day=1)
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    return [
+        "day", day, day,
+        "week", week, week + timedelta(days=6),
+        "month", month, next_month - timedelta(days=1),
+    ]
+
+
+def _records_by_exercise(rows):
+    records = {}
+    for exercise, record, at_weight, value, previous, workout_date in rows:
+        records.setdefault(exercise, {})[(record, at_weight)] = (
+            value, previous, str(workout_date)
+        )
+    return records
+
+
+def set_list(value):
+    # Set arrays come back as lists from Postgres and Parquet and as JSON
+    # text from SQLite; None for rows logged as sets x reps
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def set_json(values):
+    return None if values is None else json.dumps(values, separators=(",", ":"))
+
+
+def _pg_array(values):
+    # Array literal for COPY; an empty CSV field is NULL
+    return None if values is None else "{" + ",".join(map(str, values)) + "}"
+
+
+def workout_values(vals):
+    # (sets, reps, weight, set_reps, set_weights) for one exercise of a
+    # save. With per-set lists, sets/reps/weight become the set count and
+    # the top set (heaviest, then most reps), which prefill and e1RM read.
+    set_reps, set_weights = vals.get("set_reps"), vals.get("set_weights")
+    if not set_reps and not set_weights:
+        return vals["sets"], vals["reps"], vals["weight"], None, None
+    if len(set_reps or ()) != len(set_weights or ()):
+        raise ValueError("set_reps and set_weights must have one value per set")
+    set_reps = [int(reps) for reps in set_reps]
+    set_weights = [float(weight) for weight in set_weights]
+    if min(set_reps) < 0 or min(set_weights) < 0:
+        raise ValueError("set reps and weights must not be negative")
+    top_weight, top_reps = max(zip(set_weights, set_reps))
+    return len(set_reps), top_reps, top_weight, set_reps, set_weights
+
+
+def set_volume(set_reps, set_weights):
+    return sum(r * w for r, w in zip(set_list(set_reps), set_list(set_weights)))
+
+
+def row_volume(sets, reps, weight, set_reps=None, set_weights=None):
+    # Python twin of PG_SET_VOLUME / SQLITE_SET_VOLUME
+    if set_reps is None:
+        return sets * reps * weight
+    return set_volume(set_reps, set_weights)
+
+
+def spanning_periods(workout_date, archived_before):
+    # (grain, start, end) of the periods holding workout_date that began
+    # before the archive boundary, i.e. the week it cuts through. Their
+    # archived rows are gone, so they can't be re-aggregated; saves adjust
+    # them by the change in the saved rows instead (rollup_delta).
+    if archived_before is None:
+        return []
+    before = _as_date(archived_before)
+    periods = rollup_periods(workout_date)
+    return [
+        tuple(periods[i:i + 3]) for i in range(0, len(periods), 3)
+        if periods[i + 1] < before
+    ]
+
+
+def rollup_delta(rows, old, elsewhere):
+    # (exercises, sets, reps, volume) that saving `rows` adds to a period.
+    # old maps exercise -> (sets, reps, weight, set_reps, set_weights) as
+    # stored for the day before the save; elsewhere holds the saved
+    # exercises logged on the period's other days still in the database.
+    # An exercise only on its archived days is counted again.
+    exercises = sets = reps = volume = 0
+    for row in rows:
+        exercise, values = row[4], row[5:10]
+        if exercise in old:
+            before = old[exercise]
+            sets -= before[0]
+            reps -= before[1]
+            volume -= row_volume(*before)
+        elif exercise not in elsewhere:
+            exercises += 1
+        sets += values[0]
+        reps += values[1]
+        volume += row_volume(*values)
+    return exercises, sets, reps, volume
+
+
+def _archived_error(workout_date, archived_before):
+    # Archived months are read from their Parquet files and their rollups
+    # are frozen, so a save there would show up twice and count nowhere
+    return ValueError(
+        f"{workout_date} is in history archived before {archived_before}; "
+        "it can no longer be changed"
+    )
+
+
+def _workout_rows(user_id, workout_date, workout_type, data):
+    return [
+        (user_id, workout_date, workout_type, section, ex, *workout_values(vals))
+        for section, exercises in data.items()
+        for ex, vals in exercises.items()
+    ]
+
+
+# =========================
+# Postgres (Supabase)
+# =========================
+PG_HISTORY = """
+    SELECT workout_date, workout_type, section, exercise,
+           sets, reps, weight, created_at, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = %s
+"""
+
+# Re-aggregates the day, week and month containing a save from the raw
+# rows of that period only, so its cost is independent of history size.
+# Periods starting before the archive boundary are left to PG_ROLLUP_ADJUST.
+PG_ROLLUP_REFRESH = """
+    INSERT INTO workout_rollups
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT w.user_id, p.grain, p.period_start, w.workout_type,
+           COUNT(DISTINCT w.exercise), SUM(w.sets), SUM(w.reps),
+           SUM(""" + PG_SET_VOLUME + """)
+    FROM (VALUES (%s, %s::date, %s::date), (%s, %s::date, %s::date), (%s, %s::date, %s::date))
+        AS p(grain, period_start, period_end)
+    JOIN workouts w
+      ON w.user_id = %s
+     AND w.workout_date BETWEEN p.period_start AND p.period_end
+     AND w.workout_type = %s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM archived_history a
+        WHERE a.user_id = w.user_id AND p.period_start < a.archived_before
+    )
+    GROUP BY w.user_id, p.grain, p.period_start, w.workout_type
+    ON CONFLICT (user_id, grain, period_start, workout_type) DO UPDATE
+    SET exercises = EXCLUDED.exercises,
+        sets = EXCLUDED.sets,
+        reps = EXCLUDED.reps,
+        volume = EXCLUDED.volume
+"""
+
+PG_ROLLUP_ADJUST = """
+    INSERT INTO workout_rollups AS r
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (user_id, grain, period_start, workout_type) DO UPDATE
+    SET exercises = r.exercises + EXCLUDED.exercises,
+        sets = r.sets + EXCLUDED.sets,
+        reps = r.reps + EXCLUDED.reps,
+        volume = r.volume + EXCLUDED.volume
+"""
+
+# The saved rows as stored before the save, and the saved exercises on a
+# period's other days, for rollup_delta
+PG_SAVED_ROWS = """
+    SELECT exercise, sets, reps, weight, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = %s AND workout_date = %s AND workout_type = %s
+      AND exercise = ANY(%s)
+"""
+
+PG_PERIOD_EXERCISES = """
+    SELECT DISTINCT exercise
+    FROM workouts
+    WHERE user_id = %s AND workout_type = %s AND workout_date BETWEEN %s AND %s
+      AND workout_date <> %s AND exercise = ANY(%s)
+"""
+
+PG_ARCHIVED_BEFORE = """
+    SELECT archived_before FROM archived_history WHERE user_id = %s
+"""
+
+PG_HELD_RECORDS = """
+    SELECT DISTINCT exercise FROM personal_records
+    WHERE user_id = %s AND workout_date = %s AND exercise = ANY(%s)
+"""
+
+# Raises the records the saved rows beat, reading only those rows. Sets at
+# the same weight collapse to their best first, since one upsert can't touch
+# a record twice. This only ever raises a record, so exercises that already
+# held one on the saved day (PG_HELD_RECORDS, read before the upsert) are
+# recomputed from all their rows with PG_RECORDS_RECOMPUTE afterwards.
+PG_RECORDS_UPDATE = """
+    INSERT INTO personal_records AS pr
+        (user_id, exercise, record, at_weight, value, workout_date)
+    SELECT w.user_id, w.exercise, r.record, r.at_weight, MAX(r.value), w.workout_date
+    FROM workouts w
+    CROSS JOIN LATERAL (
+        VALUES ('weight', 0::real, w.weight::double precision),
+               ('volume', 0::real, """ + PG_SET_VOLUME + """)
+        UNION ALL
+        SELECT 'reps', s.weight, s.reps::double precision
+        FROM unnest(COALESCE(w.set_weights, ARRAY[w.weight]),
+                    COALESCE(w.set_reps, ARRAY[w.reps])) AS s(weight, reps)
+        WHERE s.reps > 0
+    ) AS r(record, at_weight, value)
+    WHERE w.user_id = %s AND w.workout_date = %s AND w.workout_type = %s
+      AND w.exercise = ANY(%s)
+      AND w.sets > 0 AND w.reps > 0 AND (r.record = 'reps' OR w.weight > 0)
+    GROUP BY w.user_id, w.exercise, r.record, r.at_weight, w.workout_date
+    ON CONFLICT (user_id, exercise, record, at_weight) DO UPDATE
+    SET previous = CASE WHEN pr.workout_date = EXCLUDED.workout_date
+                        THEN pr.previous ELSE pr.value END,
+        value = EXCLUDED.value,
+        workout_date = EXCLUDED.workout_date
+    WHERE EXCLUDED.value > pr.value
+"""
+
+PG_EXPORT = """
+    SELECT {columns}
+    FROM workouts
+    WHERE user_id = %s
+    ORDER BY workout_date, workout_type, exercise
+"""
+
+# CSV has no array type, so exported set lists are JSON like SQLite's
+PG_CSV_COLUMNS = {
+    "set_reps": "array_to_json(set_reps) AS set_reps",
+    "set_weights": "array_to_json(set_weights) AS set_weights",
+}
+
+PG_COLD_ROWS = """
+    SELECT workout_date, workout_type, section, exercise,
+           sets, reps, weight, created_at, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = %s AND workout_date < %s
+    ORDER BY workout_date, workout_type, exercise
+"""
+
+class PostgresBackend(StorageBackend):
+    name = "postgres"
+
+    def __init__(self):
+        # Imported here so the SQLite backend runs without psycopg2
+        from db import get_cursor, note_write, read_cursor
+        from psycopg2.extras import execute_values
+
+        # Reads may go to a replica; writes always go to the primary and
+        # keep that user's reads on it for a while (see db.py)
+        self._get_cursor = get_cursor
+        self._read_cursor = read_cursor
+        self._note_write = note_write
+        self._execute_values = execute_values
+
+    def ensure_schema(self):
+        with self._get_cursor() as cursor:
+            return migrate(cursor)
+
+    def get_last_dated(self, user_id, exercises):
+        # One round trip for the whole workout type instead of one per exercise
+        with self._read_cursor(user_id) as cursor:
+            cursor.execute("""
+                SELECT DISTINCT ON (exercise)
+                       exercise, workout_date, sets, reps, weight, set_reps, set_weights
+                FROM workouts
+                WHERE user_id = %s AND exercise = ANY(%s)
+                ORDER BY exercise, workout_date DESC, created_at DESC
+            """, (user_id, list(exercises)))
+            return {row[0]: (row[1], row[2:]) for row in cursor.fetchall()}
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        with self._read_cursor(user_id) as cursor:
+            cursor.execute("""
+                SELECT exercise, section, sets, reps, weight, set_reps, set_weights
+                FROM workouts
+                WHERE user_id = %s AND workout_date = %s AND workout_type = %s
+            """, (user_id, workout_date, workout_type))
+            return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        rows = _workout_rows(user_id, workout_date, workout_type, data)
+        if not rows:
+            return
+
+        # One transaction: a single multi-row upsert of the changed rows, and
+        # rows whose values match are left alone so they don't become dead tuples.
+        # The conflict target is workouts_date_type_exercise_key (migrations
+        # 2 and 5); get_backend() migrates before the first save.
+        exercises = [row[4] for row in rows]
+        with self._get_cursor() as cursor:
+            cursor.execute(PG_ARCHIVED_BEFORE, (user_id,))
+            archived_before = (cursor.fetchone() or (None,))[0]
+            if archived_before is not None and _as_date(workout_date) < archived_before:
+                raise _archived_error(workout_date, archived_before)
+            spanning = spanning_periods(workout_date, archived_before)
+            if spanning:
+                cursor.execute(PG_SAVED_ROWS, (user_id, workout_date, workout_type, exercises))
+                old = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute(PG_HELD_RECORDS, (user_id, workout_date, exercises))
+            held = [row[0] for row in cursor.fetchall()]
+            self._execute_values(cursor, """
+                INSERT INTO workouts
+                (user_id, workout_date, workout_type, section, exercise, sets, reps, weight,
+                 set_reps, set_weights)
+                VALUES %s
+                ON CONFLICT (user_id, workout_date, workout_type, exercise) DO UPDATE
+                SET section = EXCLUDED.section,
+                    sets = EXCLUDED.sets,
+                    reps = EXCLUDED.reps,
+                    weight = EXCLUDED.weight,
+                    set_reps = EXCLUDED.set_reps,
+                    set_weights = EXCLUDED.set_weights,
+                    created_at = now()
+                WHERE (workouts.section, workouts.sets, workouts.reps, workouts.weight,
+                       workouts.set_reps, workouts.set_weights)
+                    IS DISTINCT FROM
+                    (EXCLUDED.section, EXCLUDED.sets, EXCLUDED.reps, EXCLUDED.weight,
+                     EXCLUDED.set_reps, EXCLUDED.set_weights)
+            """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s::integer[], %s::real[])",
+                page_size=max(len(rows), 1))
+
+            cursor.execute(
+                PG_ROLLUP_REFRESH,
+                rollup_periods(workout_date) + [user_id, workout_type]
+            )
+            for grain, start, end in spanning:
+                cursor.execute(PG_PERIOD_EXERCISES, (
+                    user_id, workout_type, start, end, workout_date, exercises
+                ))
+                elsewhere = {row[0] for row in cursor.fetchall()}
+                cursor.execute(PG_ROLLUP_ADJUST, (
+                    user_id, grain, start, workout_type, *rollup_delta(rows, old, elsewhere)
+                ))
+            cursor.execute(PG_RECORDS_UPDATE, (
+                user_id, workout_date, workout_type, exercises
+            ))
+            if held:
+                cursor.execute(PG_RECORDS_RECOMPUTE, {"user_id": user_id, "exercises": held})
+        self._note_write(user_id)
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        with self._read_cursor(user_id) as cursor:
+            cursor.execute("""
+                SELECT period_start, workout_type, exercises, sets, reps, volume
+                FROM workout_rollups
+                WHERE user_id = %s AND grain = %s AND period_start BETWEEN %s AND %s
+                ORDER BY period_start, workout_type
+            """, (user_id, grain, start_date, end_date))
+            return cursor.fetchall()
+
+    def rebuild_rollups(self, user_id=None):
+        with self._get_cursor() as cursor:
+            cursor.execute(PG_ROLLUP_REBUILD, {"user_id": user_id})
+
+    def get_personal_records(self, user_id, exercises):
+        with self._read_cursor(user_id) as cursor:
+            cursor.execute("""
+                SELECT exercise, record, at_weight, value, previous, workout_date
+                FROM personal_records
+                WHERE user_id = %s AND exercise = ANY(%s)
+            """, (user_id, list(exercises)))
+            return _records_by_exercise(cursor.fetchall())
+
+    def rebuild_records(self, user_id=None):
+        with self._get_cursor() as cursor:
+            cursor.execute(PG_RECORDS_REBUILD, {"user_id": user_id})
+
+    def get_history(self, user_id, since=None):
+        with self._read_cursor(user_id) as cursor:
+            if since is None:
+                cursor.execute(PG_HISTORY + " ORDER BY created_at", (user_id,))
+            else:
+                cursor.execute(
+                    PG_HISTORY + " AND created_at > %s ORDER BY created_at",
+                    (user_id, since)
+                )
+            return cursor.fetchall()
+
+    def iter_history(self, user_id, columns, chunk_size):
+        # Server-side cursor: the client holds one chunk at a time
+        with self._read_cursor(user_id, name="history_export") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(PG_EXPORT.format(columns=_column_list(columns)), (user_id,))
+            while chunk := cursor.fetchmany(chunk_size):
+                yield chunk
+
+    def export_csv(self, user_id, columns, out):
+        # COPY formats the CSV server-side and streams it straight into out
+        _column_list(columns)
+        select = ", ".join(PG_CSV_COLUMNS.get(name, name) for name in columns)
+        with self._read_cursor(user_id) as cursor:
+            query = cursor.mogrify(PG_EXPORT.format(columns=select), (user_id,)).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+
+    def import_history(self, user_id, chunks):
+        # COPY every chunk into a temp table, then merge once; the whole
+        # import commits or rolls back as one transaction
+        with self._get_cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE workouts_import (
+                    workout_date DATE,
+                    workout_type TEXT,
+                    section TEXT,
+                    exercise TEXT,
+                    sets INTEGER,
+                    reps INTEGER,
+                    weight REAL,
+                    set_reps INTEGER[],
+                    set_weights REAL[]
+                ) ON COMMIT DROP
+            """)
+            for chunk in chunks:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    row[:7] + (_pg_array(row[7]), _pg_array(row[8])) for row in chunk
+                )
+                buffer.seek(0)
+                cursor.copy_expert("COPY workouts_import FROM STDIN WITH (FORMAT csv)", buffer)
+
+            # The first copy of a row duplicated within the file wins
+            cursor.execute("""
+                INSERT INTO workouts
+                (user_id, workout_date, workout_type, section, exercise, sets, reps, weight,
+                 set_reps, set_weights)
+                SELECT DISTINCT ON (workout_date, workout_type, exercise)
+                       %s, workout_date, workout_type, section, exercise, sets, reps, weight,
+                       set_reps, set_weights
+                FROM workouts_import
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM archived_history a
+                    WHERE a.user_id = %s AND workout_date < a.archived_before
+                )
+                ORDER BY workout_date, workout_type, exercise, ctid
+                ON CONFLICT (user_id, workout_date, workout_type, exercise) DO NOTHING
+            """, (user_id, user_id))
+            inserted = cursor.rowcount
+            cursor.execute(PG_ROLLUP_REBUILD, {"user_id": user_id})
+            cursor.execute(PG_RECORDS_REBUILD, {"user_id": user_id})
+        self._note_write(user_id)
+        return inserted
+
+    def get_user_ids(self):
+        with self._get_cursor() as cursor:
+            cursor.execute("SELECT DISTINCT user_id FROM workouts ORDER BY user_id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        # From the primary, since drop_cold_rows() deletes what this read
+        with self._get_cursor(name="history_archive") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(PG_COLD_ROWS, (user_id, before))
+            while chunk := cursor.fetchmany(chunk_size):
+                yield chunk
+
+    def drop_cold_rows(self, user_id, before, newest):
+        with self._get_cursor() as cursor:
+            cursor.execute(PG_RECORDS_ARCHIVE, {
+                "user_id": user_id, "before": before, "newest": newest
+            })
+            cursor.execute("""
+                DELETE FROM workouts
+                WHERE user_id = %s AND workout_date < %s AND created_at <= %s
+            """, (user_id, before, newest))
+            dropped = cursor.rowcount
+            cursor.execute("""
+                INSERT INTO archived_history (user_id, archived_before)
+                VALUES (%s, %s)
+                ON CONFLICT (user_id) DO UPDATE
+                SET archived_before = GREATEST(
+                    archived_history.archived_before, EXCLUDED.archived_before
+                )
+            """, (user_id, before))
+        return dropped
+
+    def archived_before(self, user_id):
+        with self._read_cursor(user_id) as cursor:
+            cursor.execute(PG_ARCHIVED_BEFORE, (user_id,))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
+# =========================
+# SQLite (local file)
+# =========================
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+]
+
+# Statement text never varies (lists go through json_each), so sqlite3's
+# per-connection statement cache prepares each one exactly once
+SQLITE_LAST_EXERCISES = """
+    SELECT exercise, workout_date, sets, reps, weight, set_reps, set_weights
+    FROM (
+        SELECT exercise, workout_date, sets, reps, weight, set_reps, set_weights,
+               ROW_NUMBER() OVER (
+                   PARTITION BY exercise
+                   ORDER BY workout_date DESC, created_at DESC
+               ) AS rn
+        FROM workouts
+        WHERE user_id = ? AND exercise IN (SELECT value FROM json_each(?))
+    )
+    WHERE rn = 1
+"""
+
+SQLITE_UPSERT = """
+    INSERT INTO workouts
+    (user_id, workout_date, workout_type, section, exercise, sets, reps, weight,
+     set_reps, set_weights, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    ON CONFLICT (user_id, workout_date, workout_type, exercise) DO UPDATE
+    SET section = excluded.section,
+        sets = excluded.sets,
+        reps = excluded.reps,
+        weight = excluded.weight,
+        set_reps = excluded.set_reps,
+        set_weights = excluded.set_weights,
+        created_at = excluded.created_at
+    WHERE (section, sets, reps, weight, set_reps, set_weights)
+        IS NOT (excluded.section, excluded.sets, excluded.reps, excluded.weight,
+                excluded.set_reps, excluded.set_weights)
+"""
+
+SQLITE_WORKOUT = """
+    SELECT exercise, section, sets, reps, weight, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = ? AND workout_date = ? AND workout_type = ?
+"""
+
+SQLITE_ROLLUP_REFRESH = """
+    WITH p(grain, period_start, period_end) AS (
+        VALUES (?, ?, ?), (?, ?, ?), (?, ?, ?)
+    )
+    INSERT INTO workout_rollups
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    SELECT w.user_id, p.grain, p.period_start, w.workout_type,
+           COUNT(DISTINCT w.exercise), SUM(w.sets), SUM(w.reps),
+           SUM(""" + SQLITE_SET_VOLUME + """)
+    FROM p
+    JOIN workouts w
+      ON w.user_id = ?
+     AND w.workout_date BETWEEN p.period_start AND p.period_end
+     AND w.workout_type = ?
+    WHERE NOT EXISTS (
+        SELECT 1 FROM archived_history a
+        WHERE a.user_id = w.user_id AND p.period_start < a.archived_before
+    )
+    GROUP BY w.user_id, p.grain, p.period_start, w.workout_type
+    ON CONFLICT (user_id, grain, period_start, workout_type) DO UPDATE
+    SET exercises = excluded.exercises,
+        sets = excluded.sets,
+        reps = excluded.reps,
+        volume = excluded.volume
+"""
+
+SQLITE_ROLLUPS = """
+    SELECT period_start, workout_type, exercises, sets, reps, volume
+    FROM workout_rollups
+    WHERE user_id = ? AND grain = ? AND period_start BETWEEN ? AND ?
+    ORDER BY period_start, workout_type
+"""
+
+# See PG_ROLLUP_ADJUST
+SQLITE_ROLLUP_ADJUST = """
+    INSERT INTO workout_rollups
+        (user_id, grain, period_start, workout_type, exercises, sets, reps, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, grain, period_start, workout_type) DO UPDATE
+    SET exercises = workout_rollups.exercises + excluded.exercises,
+        sets = workout_rollups.sets + excluded.sets,
+        reps = workout_rollups.reps + excluded.reps,
+        volume = workout_rollups.volume + excluded.volume
+"""
+
+SQLITE_SAVED_ROWS = """
+    SELECT exercise, sets, reps, weight, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = ? AND workout_date = ? AND workout_type = ?
+      AND exercise IN (SELECT value FROM json_each(?))
+"""
+
+SQLITE_PERIOD_EXERCISES = """
+    SELECT DISTINCT exercise
+    FROM workouts
+    WHERE user_id = ? AND workout_type = ? AND workout_date BETWEEN ? AND ?
+      AND workout_date <> ? AND exercise IN (SELECT value FROM json_each(?))
+"""
+
+SQLITE_ARCHIVED_BEFORE = """
+    SELECT archived_before FROM archived_history WHERE user_id = ?
+"""
+
+SQLITE_HELD_RECORDS = """
+    SELECT DISTINCT exercise FROM personal_records
+    WHERE user_id = ? AND workout_date = ? AND exercise IN (SELECT value FROM json_each(?))
+"""
+
+# See PG_RECORDS_UPDATE
+SQLITE_RECORDS_UPDATE = """
+    INSERT INTO personal_records
+        (user_id, exercise, record, at_weight, value, workout_date)
+    SELECT user_id, exercise, record, at_weight, value, workout_date
+    FROM (
+        SELECT user_id, exercise, 'weight' AS record, 0 AS at_weight,
+               weight AS value, workout_date, weight > 0 AS counts, sets, reps
+        FROM workouts
+        WHERE user_id = :user_id AND workout_date = :workout_date
+          AND workout_type = :workout_type
+          AND exercise IN (SELECT value FROM json_each(:exercises))
+        UNION ALL
+        SELECT user_id, exercise, 'reps', weight, reps, workout_date,
+               set_reps IS NULL, sets, reps
+        FROM workouts
+        WHERE user_id = :user_id AND workout_date = :workout_date
+          AND workout_type = :workout_type
+          AND exercise IN (SELECT value FROM json_each(:exercises))
+        UNION ALL
+        SELECT user_id, exercise, 'reps', sw.value, sr.value, workout_date,
+               sr.value > 0, sets, reps
+        FROM workouts, json_each(set_reps) sr
+        JOIN json_each(set_weights) sw ON sw.key = sr.key
+        WHERE user_id = :user_id AND workout_date = :workout_date
+          AND workout_type = :workout_type
+          AND exercise IN (SELECT value FROM json_each(:exercises))
+        UNION ALL
+        SELECT user_id, exercise, 'volume', 0, """ + SQLITE_SET_VOLUME + """, workout_date,
+               weight > 0, sets, reps
+        FROM workouts
+        WHERE user_id = :user_id AND workout_date = :workout_date
+          AND workout_type = :workout_type
+          AND exercise IN (SELECT value FROM json_each(:exercises))
+    )
+    WHERE counts AND sets > 0 AND reps > 0
+    ON CONFLICT (user_id, exercise, record, at_weight) DO UPDATE
+    SET previous = CASE WHEN personal_records.workout_date = excluded.workout_date
+                        THEN personal_records.previous ELSE personal_records.value END,
+        value = excluded.value,
+        workout_date = excluded.workout_date
+    WHERE excluded.value > personal_records.value
+"""
+
+SQLITE_RECORDS = """
+    SELECT exercise, record, at_weight, value, previous, workout_date
+    FROM personal_records
+    WHERE user_id = ? AND exercise IN (SELECT value FROM json_each(?))
+"""
+
+SQLITE_HISTORY = """
+    SELECT workout_date, workout_type, section, exercise,
+           sets, reps, weight, created_at, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = ?
+"""
+
+SQLITE_EXPORT = """
+    SELECT {columns}
+    FROM workouts
+    WHERE user_id = ?
+    ORDER BY workout_date, workout_type, exercise
+"""
+
+# Days before the user's archive boundary are skipped like existing rows
+SQLITE_IMPORT = """
+    INSERT OR IGNORE INTO workouts
+    (user_id, workout_date, workout_type, section, exercise, sets, reps, weight,
+     set_reps, set_weights, created_at)
+    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE NOT EXISTS (
+        SELECT 1 FROM archived_history
+        WHERE user_id = ?1 AND ?2 < archived_before
+    )
+"""
+
+SQLITE_COLD_ROWS = """
+    SELECT workout_date, workout_type, section, exercise,
+           sets, reps, weight, created_at, set_reps, set_weights
+    FROM workouts
+    WHERE user_id = ? AND workout_date < ?
+    ORDER BY workout_date, workout_type, exercise
+"""
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        # Idle connections shared by all sessions. Streamlit runs every rerun
+        # on a fresh thread, so thread-local connections would reconnect
+        # (and re-run the pragmas) on each rerun.
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=64,
+            factory=TimedSQLiteConnection
+        )
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        # WAL lets readers on other connections run alongside a writer
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def ensure_schema(self):
+        with self._connection() as conn:
+            return migrate_sqlite(conn)
+
+    def get_last_dated(self, user_id, exercises):
+        with self._connection() as conn:
+            rows = conn.execute(
+                SQLITE_LAST_EXERCISES, (user_id, json.dumps(list(exercises)))
+            ).fetchall()
+        return {
+            row[0]: (row[1], row[2:5] + (set_list(row[5]), set_list(row[6])))
+            for row in rows
+        }
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        with self._connection() as conn:
+            rows = conn.execute(
+                SQLITE_WORKOUT, (user_id, str(workout_date), workout_type)
+            ).fetchall()
+        return {row[0]: row[1:5] + (set_list(row[5]), set_list(row[6])) for row in rows}
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        workout_date = str(workout_date)
+        rows = [
+            row[:8] + (set_json(row[8]), set_json(row[9]))
+            for row in _workout_rows(user_id, workout_date, workout_type, data)
+        ]
+        if not rows:
+            return
+
+        exercises = json.dumps([row[4] for row in rows])
+        with self._connection() as conn, conn:
+            archived_before = (
+                conn.execute(SQLITE_ARCHIVED_BEFORE, (user_id,)).fetchone() or (None,)
+            )[0]
+            if archived_before is not None and workout_date < archived_before:
+                raise _archived_error(workout_date, archived_before)
+            spanning = spanning_periods(workout_date, archived_before)
+            if spanning:
+                old = {row[0]: row[1:] for row in conn.execute(
+                    SQLITE_SAVED_ROWS, (user_id, workout_date, workout_type, exercises)
+                )}
+            held = [row[0] for row in conn.execute(
+                SQLITE_HELD_RECORDS, (user_id, workout_date, exercises)
+            )]
+            conn.executemany(SQLITE_UPSERT, rows)
+            conn.execute(SQLITE_ROLLUP_REFRESH, [
+                str(value) for value in rollup_periods(workout_date)
+            ] + [user_id, workout_type])
+            for grain, start, end in spanning:
+                elsewhere = {row[0] for row in conn.execute(SQLITE_PERIOD_EXERCISES, (
+                    user_id, workout_type, str(start), str(end), workout_date, exercises
+                ))}
+                conn.execute(SQLITE_ROLLUP_ADJUST, (
+                    user_id, grain, str(start), workout_type,
+                    *rollup_delta(rows, old, elsewhere)
+                ))
+            conn.execute(SQLITE_RECORDS_UPDATE, {
+                "user_id": user_id,
+                "workout_date": workout_date,
+                "workout_type": workout_type,
+                "exercises": exercises,
+            })
+            if held:
+                for statement in SQLITE_RECORDS_RECOMPUTE:
+                    conn.execute(statement, {"user_id": user_id, "exercises": json.dumps(held)})
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        with self._connection() as conn:
+            return conn.execute(
+                SQLITE_ROLLUPS, (user_id, grain, str(start_date), str(end_date))
+            ).fetchall()
+
+    def rebuild_rollups(self, user_id=None):
+        with self._connection() as conn, conn:
+            for statement in SQLITE_ROLLUP_REBUILD:
+                conn.execute(statement, {"user_id": user_id})
+
+    def get_personal_records(self, user_id, exercises):
+        with self._connection() as conn:
+            rows = conn.execute(
+                SQLITE_RECORDS, (user_id, json.dumps(list(exercises)))
+            ).fetchall()
+        return _records_by_exercise(rows)
+
+    def rebuild_records(self, user_id=None):
+        with self._connection() as conn, conn:
+            for statement in SQLITE_RECORDS_REBUILD:
+                conn.execute(statement, {"user_id": user_id})
+
+    def get_history(self, user_id, since=None):
+        with self._connection() as conn:
+            if since is None:
+                return conn.execute(
+                    SQLITE_HISTORY + " ORDER BY created_at", (user_id,)
+                ).fetchall()
+            return conn.execute(
+                SQLITE_HISTORY + " AND created_at > ? ORDER BY created_at",
+                (user_id, since)
+            ).fetchall()
+
+    def iter_history(self, user_id, columns, chunk_size):
+        with self._connection() as conn:
+            cursor = conn.execute(
+                SQLITE_EXPORT.format(columns=_column_list(columns)), (user_id,)
+            )
+            while chunk := cursor.fetchmany(chunk_size):
+                yield chunk
+
+    def import_history(self, user_id, chunks):
+        # One transaction per chunk keeps the WAL small; an interrupted
+        # import can simply be rerun since existing rows are skipped
+        inserted = 0
+        with self._connection() as conn:
+            for chunk in chunks:
+                with conn:
+                    before = conn.total_changes
+                    conn.executemany(SQLITE_IMPORT, [
+                        (user_id,) + tuple(row[:7]) + (set_json(row[7]), set_json(row[8]))
+                        for row in chunk
+                    ])
+                    inserted += conn.total_changes - before
+            with conn:
+                for statement in SQLITE_ROLLUP_REBUILD + SQLITE_RECORDS_REBUILD:
+                    conn.execute(statement, {"user_id": user_id})
+        return inserted
+
+    def get_user_ids(self):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT user_id FROM workouts ORDER BY user_id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        with self._connection() as conn:
+            cursor = conn.execute(SQLITE_COLD_ROWS, (user_id, str(before)))
+            while chunk := cursor.fetchmany(chunk_size):
+                yield chunk
+
+    def drop_cold_rows(self, user_id, before, newest):
+        with self._connection() as conn, conn:
+            conn.execute(SQLITE_RECORDS_ARCHIVE, {
+                "user_id": user_id, "before": str(before), "newest": newest
+            })
+            dropped = conn.execute("""
+                DELETE FROM workouts
+                WHERE user_id = ? AND workout_date < ? AND created_at <= ?
+            """, (user_id, str(before), newest)).rowcount
+            conn.execute("""
+                INSERT INTO archived_history (user_id, archived_before)
+                VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE
+                SET archived_before = max(archived_before, excluded.archived_before)
+            """, (user_id, str(before)))
+        return dropped
+
+    def archived_before(self, user_id):
+        with self._connection() as conn:
+            row = conn.execute(SQLITE_ARCHIVED_BEFORE, (user_id,)).fetchone()
+        return row[0] if row else None
+
+
+# =========================
+# Archived History
+# =========================
+class ArchiveBackend(StorageBackend):
+    # History readers (analytics, export) see the user's archived months
+    # followed by the rows still in the database; everything else goes
+    # straight to the database
+    def __init__(self, inner, archive):
+        self.inner = inner
+        self.archive = archive
+        self.name = inner.name
+
+    def ensure_schema(self):
+        return self.inner.ensure_schema()
+
+    def get_last_exercises(self, user_id, exercises):
+        return self.inner.get_last_exercises(user_id, exercises)
+
+    def get_last_dated(self, user_id, exercises):
+        return self.inner.get_last_dated(user_id, exercises)
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        return self.inner.save_workout(user_id, workout_date, workout_type, data)
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        return self.inner.get_workout(user_id, workout_date, workout_type)
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        # Rollups of archived periods stay in the database
+        return self.inner.get_rollups(user_id, grain, start_date, end_date)
+
+    def get_weekly_summary(self, user_id, start_date, end_date):
+        return self.inner.get_weekly_summary(user_id, start_date, end_date)
+
+    def rebuild_rollups(self, user_id=None):
+        return self.inner.rebuild_rollups(user_id)
+
+    def get_personal_records(self, user_id, exercises):
+        return self.inner.get_personal_records(user_id, exercises)
+
+    def rebuild_records(self, user_id=None):
+        return self.inner.rebuild_records(user_id)
+
+    def get_history(self, user_id, since=None):
+        hot = self.inner.get_history(user_id, since)
+        cold = self.archive.history(user_id, since, self.name)
+        if not cold:
+            return hot
+        return list(heapq.merge(cold, hot, key=lambda row: str(row[7])))
+
+    def iter_history(self, user_id, columns, chunk_size):
+        # Archived months all precede the database rows, so date order holds
+        yield from self.archive.iter_rows(user_id, columns, chunk_size, self.name)
+        yield from self.inner.iter_history(user_id, columns, chunk_size)
+
+    def export_csv(self, user_id, columns, out):
+        # The backend's own (COPY) export only sees the database
+        if self.archive.partitions(user_id):
+            return StorageBackend.export_csv(self, user_id, columns, out)
+        return self.inner.export_csv(user_id, columns, out)
+
+    def import_history(self, user_id, chunks):
+        return self.inner.import_history(user_id, chunks)
+
+    def get_user_ids(self):
+        return self.inner.get_user_ids()
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        return self.inner.iter_cold_rows(user_id, before, chunk_size)
+
+    def drop_cold_rows(self, user_id, before, newest):
+        return self.inner.drop_cold_rows(user_id, before, newest)
+
+    def archived_before(self, user_id):
+        return self.inner.archived_before(user_id)
+
+
+# =========================
+# Write-behind (offline-first saves)
+# =========================
+class WriteBehindBackend(StorageBackend):
+    # Saves commit to the local journal and return immediately; reads
+    # overlay journaled rows so prefill and summary stay correct until
+    # the worker has flushed them to the primary
+    def __init__(self, inner, journal_path):
+        self.inner = inner
+        self.name = inner.name
+        self.journal = Journal(journal_path)
+        self.worker = SyncWorker(self.journal, inner)
+
+    def ensure_schema(self):
+        return self.inner.ensure_schema()
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        # Rejected up front when the primary can say so; offline, the
+        # worker drops it once the primary does
+        try:
+            archived_before = self.inner.archived_before(user_id)
+        except Exception:
+            archived_before = None
+        if archived_before is not None and str(workout_date) < str(archived_before):
+            raise _archived_error(workout_date, archived_before)
+        self.journal.append(user_id, workout_date, workout_type, data)
+        self.worker.notify()
+
+    def get_last_dated(self, user_id, exercises):
+        # A pending save only wins over the stored log when it is dated on or
+        # after it, so a backdated entry doesn't replace the latest values
+        exercises = list(exercises)
+        last = {
+            ex: (str(workout_date), values)
+            for ex, (workout_date, values) in self.inner.get_last_dated(user_id, exercises).items()
+        }
+        wanted = set(exercises)
+
+        for _, _, workout_date, _, data in self.journal.pending(user_id):
+            for values in data.values():
+                for ex, vals in values.items():
+                    if ex in wanted and workout_date >= last.get(ex, ("",))[0]:
+                        last[ex] = (workout_date, workout_values(vals))
+        return last
+
+    def get_weekly_summary(self, user_id, start_date, end_date):
+        rows = self.inner.get_weekly_summary(user_id, start_date, end_date)
+
+        pending = {}
+        for _, _, workout_date, workout_type, data in self.journal.pending(user_id):
+            if str(start_date) <= workout_date <= str(end_date):
+                combined = pending.setdefault((workout_date, workout_type), {})
+                for values in data.values():
+                    combined.update(values)
+        if not pending:
+            return rows
+
+        # Saves carry only changed exercises, so overlay them on the rows
+        # already stored for that day and re-aggregate just those days
+        merged = {(str(r[0]), r[1]): (str(r[0]),) + tuple(r[1:]) for r in rows}
+        for (workout_date, workout_type), changes in pending.items():
+            values = {
+                ex: saved[1:]
+                for ex, saved
+                in self.inner.get_workout(user_id, workout_date, workout_type).items()
+            }
+            values.update((ex, workout_values(vals)) for ex, vals in changes.items())
+            merged[(workout_date, workout_type)] = (
+                workout_date,
+                workout_type,
+                len(values),
+                sum(v[0] for v in values.values()),
+                sum(v[1] for v in values.values()),
+                sum(row_volume(*v) for v in values.values()),
+            )
+        return [merged[key] for key in sorted(merged)]
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        saved = self.inner.get_workout(user_id, workout_date, workout_type)
+        for _, _, pending_date, pending_type, data in self.journal.pending(user_id):
+            if (pending_date, pending_type) == (str(workout_date), workout_type):
+                for section, exercises in data.items():
+                    for ex, vals in exercises.items():
+                        saved[ex] = (section, *workout_values(vals))
+        return saved
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        # Week and month rollups include journaled saves once flushed
+        return self.inner.get_rollups(user_id, grain, start_date, end_date)
+
+    def rebuild_rollups(self, user_id=None):
+        return self.inner.rebuild_rollups(user_id)
+
+    def get_personal_records(self, user_id, exercises):
+        # Journaled saves count toward records once flushed
+        return self.inner.get_personal_records(user_id, exercises)
+
+    def rebuild_records(self, user_id=None):
+        return self.inner.rebuild_records(user_id)
+
+    def get_history(self, user_id, since=None):
+        # Journaled saves show up here once flushed
+        return self.inner.get_history(user_id, since)
+
+    def iter_history(self, user_id, columns, chunk_size):
+        return self.inner.iter_history(user_id, columns, chunk_size)
+
+    def export_csv(self, user_id, columns, out):
+        return self.inner.export_csv(user_id, columns, out)
+
+    def import_history(self, user_id, chunks):
+        return self.inner.import_history(user_id, chunks)
+
+    def get_user_ids(self):
+        return self.inner.get_user_ids()
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        return self.inner.iter_cold_rows(user_id, before, chunk_size)
+
+    def drop_cold_rows(self, user_id, before, newest):
+        return self.inner.drop_cold_rows(user_id, before, newest)
+
+    def archived_before(self, user_id):
+        return self.inner.archived_before(user_id)
+
+    def sync_status(self):
+        return {
+            "pending": self.journal.count(),
+            "last_error": self.worker.last_error,
+            "last_sync": self.worker.last_sync,
+            "rejected": self.worker.rejected,
+        }
+
+
+# =========================
+# Read Cache
+# =========================
+class CachedBackend(StorageBackend):
+    # Serves repeat reads from memory; save_workout bumps only the tags
+    # (the user's exercises, week, month) the saved rows touch
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+        self.name = inner.name
+
+    def ensure_schema(self):
+        return self.inner.ensure_schema()
+
+    def get_last_exercises(self, user_id, exercises):
+        exercises = tuple(exercises)
+        return self.cache.get_or_load(
+            ("last", user_id, exercises),
+            [exercise_tag(user_id, ex) for ex in exercises],
+            lambda: self.inner.get_last_exercises(user_id, exercises)
+        )
+
+    def get_last_dated(self, user_id, exercises):
+        return self.inner.get_last_dated(user_id, exercises)
+
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        try:
+            self.inner.save_workout(user_id, workout_date, workout_type, data)
+        finally:
+            # Also on failure: the write may have committed before the error
+            self.invalidate_save(user_id, workout_date, data)
+
+    def invalidate_save(self, user_id, workout_date, data):
+        day = _as_date(workout_date)
+        self.cache.invalidate(
+            [week_tag(user_id, day), month_tag(user_id, day)]
+            + [exercise_tag(user_id, ex)
+               for exercises in data.values() for ex in exercises]
+        )
+
+    def get_weekly_summary(self, user_id, start_date, end_date):
+        return self.cache.get_or_load(
+            ("week", user_id, str(start_date), str(end_date)),
+            period_tags(user_id, "day", start_date, end_date),
+            lambda: self.inner.get_weekly_summary(user_id, start_date, end_date)
+        )
+
+    def get_workout(self, user_id, workout_date, workout_type):
+        return self.cache.get_or_load(
+            ("workout", user_id, str(workout_date), workout_type),
+            [week_tag(user_id, _as_date(workout_date))],
+            lambda: self.inner.get_workout(user_id, workout_date, workout_type)
+        )
+
+    def get_rollups(self, user_id, grain, start_date, end_date):
+        return self.cache.get_or_load(
+            ("rollups", user_id, grain, str(start_date), str(end_date)),
+            period_tags(user_id, grain, start_date, end_date),
+            lambda: self.inner.get_rollups(user_id, grain, start_date, end_date)
+        )
+
+    def rebuild_rollups(self, user_id=None):
+        self.inner.rebuild_rollups(user_id)
+        self.cache.clear()
+
+    def get_personal_records(self, user_id, exercises):
+        exercises = tuple(exercises)
+        return self.cache.get_or_load(
+            ("records", user_id, exercises),
+            [exercise_tag(user_id, ex) for ex in exercises],
+            lambda: self.inner.get_personal_records(user_id, exercises)
+        )
+
+    def rebuild_records(self, user_id=None):
+        self.inner.rebuild_records(user_id)
+        self.cache.clear()
+
+    def get_history(self, user_id, since=None):
+        return self.inner.get_history(user_id, since)
+
+    def iter_history(self, user_id, columns, chunk_size):
+        return self.inner.iter_history(user_id, columns, chunk_size)
+
+    def export_csv(self, user_id, columns, out):
+        return self.inner.export_csv(user_id, columns, out)
+
+    def import_history(self, user_id, chunks):
+        try:
+            return self.inner.import_history(user_id, chunks)
+        finally:
+            self.cache.clear()
+
+    def get_user_ids(self):
+        return self.inner.get_user_ids()
+
+    def iter_cold_rows(self, user_id, before, chunk_size):
+        return self.inner.iter_cold_rows(user_id, before, chunk_size)
+
+    def drop_cold_rows(self, user_id, before, newest):
+        try:
+            return self.inner.drop_cold_rows(user_id, before, newest)
+        finally:
+            self.cache.clear()
+
+    def archived_before(self, user_id):
+        return self.inner.archived_before(user_id)
+
+    def sync_status(self):
+        return self.inner.sync_status()
+
+
+# =========================
+# Concurrent Reads
+# =========================
+@st.cache_resource
+def get_read_executor():
+    # Shared by all sessions. Each worker holds a connection while it reads,
+    # so keep read_workers below the Postgres pool_max
+    workers = int(st.secrets.get("storage", {}).get("read_workers", 4))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reads")
+
+
+def fetch_all(calls):
+    # {name: (fn, *args)} -> {name: result}. Independent reads run side by
+    # side, so a rerun waits for the slowest one instead of their sum. Each
+    # runs in a copy of the caller's context, which keeps its queries on
+    # the current rerun's trace.
+    executor = get_read_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, fn, *args)
+        for name, (fn, *args) in calls.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+@st.cache_resource
+def get_backend():
+    # One backend per server process; the schema is migrated on first use
+    cfg = st.secrets.get("storage", {})
+    kind = cfg.get("backend", "postgres")
+
+    if kind == "sqlite":
+        backend = SQLiteBackend(cfg.get("sqlite_path", "workouts.db"))
+    elif kind == "postgres":
+        backend = PostgresBackend()
+    else:
+        raise ValueError(f"Unknown storage backend: {kind}")
+
+    backend.ensure_schema()
+
+    archive_cfg = st.secrets.get("archive", {})
+    if archive_cfg.get("enabled", False):
+        from archive import Archive
+
+        backend = ArchiveBackend(backend, Archive(archive_cfg.get("path", "archive")))
+
+    write_behind_cfg = st.secrets.get("write_behind", {})
+    if write_behind_cfg.get("enabled", False):
+        backend = WriteBehindBackend(
+            backend, write_behind_cfg.get("journal_path", "journal.db")
+        )
+
+    cache_cfg = st.secrets.get("cache", {})
+    if cache_cfg.get("enabled", True):
+        cached = CachedBackend(backend, VersionedCache(
+            max_entries=int(cache_cfg.get("max_entries", 256)),
+            ttl=float(cache_cfg.get("ttl_seconds", 300))
+        ))
+        if isinstance(backend, WriteBehindBackend):
+            # Records and rollups only change once a journaled save reaches
+            # the database, so reads cached before that go stale then
+            backend.worker.on_flush = cached.invalidate_save
+        backend = cached
+    return backend
@@ -0,0 +1,67 @@
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pytest
+
+from analytics import ProgressionAnalytics, lttb
+from storage import SQLiteBackend
+
+
+def series(n):
+    x = np.arange(n, dtype=float)
+    return x, np.sin(x / 3) * x
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 7), (1000, 150), (151, 150)])
+def test_returns_threshold_points_keeping_both_ends(n, threshold):
+    selected = lttb(*series(n), threshold)
+
+    assert len(selected) == threshold
+    assert selected[0] == 0
+    assert selected[-1] == n - 1
+    assert (np.diff(selected) > 0).all()
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 150])
+def test_short_series_pass_through(n):
+    assert list(lttb(*series(n), 150)) == list(range(n))
+
+
+def test_keeps_a_spike():
+    x, y = np.arange(1000, dtype=float), np.zeros(1000)
+    y[537] = 50
+
+    assert 537 in lttb(x, y, 20)
+
+
+def test_threshold_of_two_keeps_only_the_ends():
+    assert list(lttb(*series(100), 2)) == [0, 99]
+
+
+@pytest.mark.parametrize("threshold", [1, 0, -5])
+def test_threshold_below_two_is_rejected(threshold):
+    with pytest.raises(ValueError):
+        lttb(*series(100), threshold)
+
+
+def test_refresh_over_legacy_rows_without_created_at(tmp_path):
+    path = str(tmp_path / "workouts.db")
+    backend = SQLiteBackend(path)
+    backend.ensure_schema()
+    with sqlite3.connect(path) as conn:
+        # As SQLite migration 2 leaves rows saved before created_at existed
+        conn.execute(
+            "INSERT INTO workouts (user_id, workout_date, workout_type, section, exercise,"
+            " sets, reps, weight, created_at)"
+            " VALUES ('u', '2023-01-02', 'Legs', 'Workout', 'Squat', 3, 5, 100, '')"
+        )
+    analytics = ProgressionAnalytics(backend, "u")
+    assert analytics.watermark == ""
+
+    assert analytics.refresh() == 0
+    backend.save_workout("u", date(2023, 1, 9), "Legs", {
+        "Workout": {"Squat": {"sets": 3, "reps": 5, "weight": 105.0}}
+    })
+    assert analytics.refresh() == 1
+    assert len(analytics.rows) == 2
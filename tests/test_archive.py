@@ -0,0 +1,116 @@
+import io
+from datetime import date
+
+import pytest
+
+import journal
+from archive import Archive, archive_history
+from journal import Journal, SyncWorker
+from storage import ArchiveBackend, SQLiteBackend, WriteBehindBackend
+from transfer import import_history
+
+BEFORE = date(2023, 2, 1)
+ARCHIVED_DAY, LIVE_DAY = date(2023, 1, 10), date(2023, 3, 1)
+
+
+def squat(weight):
+    return {"Workout": {"Squat": {"sets": 3, "reps": 5, "weight": weight}}}
+
+
+@pytest.fixture
+def backend(tmp_path):
+    db = SQLiteBackend(str(tmp_path / "workouts.db"))
+    db.ensure_schema()
+    db.save_workout("u", ARCHIVED_DAY, "Legs", squat(100.0))
+    db.save_workout("u", LIVE_DAY, "Legs", squat(110.0))
+    archive = Archive(tmp_path / "archive")
+    assert archive_history(db, archive, "u", BEFORE) == 1
+    return ArchiveBackend(db, archive)
+
+
+def days(rows):
+    return [str(row[0]) for row in rows]
+
+
+def test_save_into_archived_month_is_rejected(backend):
+    with pytest.raises(ValueError, match="archived before 2023-02-01"):
+        backend.save_workout("u", ARCHIVED_DAY, "Legs", squat(120.0))
+
+    assert days(backend.get_history("u")) == [str(ARCHIVED_DAY), str(LIVE_DAY)]
+    assert backend.get_workout("u", ARCHIVED_DAY, "Legs") == {}
+
+
+def test_save_after_boundary_still_works(backend):
+    backend.save_workout("u", BEFORE, "Legs", squat(120.0))
+
+    assert days(backend.get_history("u")) == [str(ARCHIVED_DAY), str(LIVE_DAY), str(BEFORE)]
+
+
+def test_other_users_are_not_bounded(backend):
+    backend.save_workout("v", ARCHIVED_DAY, "Legs", squat(120.0))
+
+    assert backend.archived_before("v") is None
+    assert days(backend.get_history("v")) == [str(ARCHIVED_DAY)]
+
+
+def test_week_across_the_boundary_follows_saves(tmp_path):
+    db = SQLiteBackend(str(tmp_path / "workouts.db"))
+    db.ensure_schema()
+    db.save_workout("u", date(2024, 2, 28), "Legs",
+                    {"Workout": {"Squat": {"sets": 1, "reps": 10, "weight": 2.0}}})
+    db.save_workout("u", date(2024, 3, 2), "Legs",
+                    {"Workout": {"Squat": {"sets": 1, "reps": 1, "weight": 10.0}}})
+    archive_history(db, Archive(tmp_path / "archive"), "u", date(2024, 3, 1))
+    week = date(2024, 2, 26)
+
+    db.save_workout("u", date(2024, 3, 2), "Legs",
+                    {"Workout": {"Squat": {"sets": 1, "reps": 1, "weight": 100.0}}})
+    assert db.get_rollups("u", "week", week, week) == [(str(week), "Legs", 1, 2, 11, 120.0)]
+
+    db.save_workout("u", date(2024, 3, 2), "Legs", {"Workout": {
+        "Squat": {"sets": 1, "reps": 1, "weight": 100.0},
+        "Lunge": {"sets": 2, "reps": 5, "weight": 10.0},
+    }})
+    db.rebuild_rollups("u")
+    assert db.get_rollups("u", "week", week, week) == [(str(week), "Legs", 2, 4, 16, 220.0)]
+
+
+def test_import_skips_archived_days(backend):
+    csv = (
+        "workout_date,workout_type,section,exercise,sets,reps,weight\n"
+        f"{ARCHIVED_DAY},Legs,Workout,Squat,3,5,100.0\n"
+        "2023-03-08,Legs,Workout,Squat,3,5,115.0\n"
+    )
+    report = import_history(backend, "u", io.BytesIO(csv.encode()))
+
+    assert (report["inserted"], report["duplicates"], report["archived"]) == (1, 0, 1)
+    assert days(backend.get_history("u")).count(str(ARCHIVED_DAY)) == 1
+
+
+def test_write_behind_rejects_up_front(backend, tmp_path):
+    write_behind = WriteBehindBackend(backend, str(tmp_path / "journal.db"))
+
+    with pytest.raises(ValueError):
+        write_behind.save_workout("u", ARCHIVED_DAY, "Legs", squat(120.0))
+    assert write_behind.journal.count() == 0
+
+
+class Refusing:
+    def save_workout(self, user_id, workout_date, workout_type, data):
+        if workout_date < str(BEFORE):
+            raise ValueError("archived")
+        self.saved = workout_date
+
+
+def test_worker_drops_refused_saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal.threading.Thread, "start", lambda self: None)
+    pending = Journal(str(tmp_path / "journal.db"))
+    pending.append("u", ARCHIVED_DAY, "Legs", squat(120.0))
+    pending.append("u", LIVE_DAY, "Legs", squat(120.0))
+    target = Refusing()
+    worker = SyncWorker(pending, target)
+
+    assert worker.flush() == 2
+    assert pending.count() == 0
+    assert target.saved == str(LIVE_DAY)
+    assert worker.rejected == f"{ARCHIVED_DAY}: archived"
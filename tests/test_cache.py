@@ -0,0 +1,109 @@
+from datetime import date
+
+import cache
+from cache import VersionedCache, exercise_tag, period_tags, week_tag
+from storage import CachedBackend, SQLiteBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def loader(values):
+    # Returns successive values and counts the calls
+    calls = []
+
+    def load():
+        calls.append(None)
+        return values[len(calls) - 1]
+
+    return load, calls
+
+
+def test_hit_until_ttl_expires(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    c = VersionedCache(ttl=10)
+    load, calls = loader(["a", "b"])
+
+    assert c.get_or_load("k", [], load) == "a"
+    clock.now += 9.9
+    assert c.get_or_load("k", [], load) == "a"
+    clock.now += 0.2
+    assert c.get_or_load("k", [], load) == "b"
+    assert len(calls) == 2
+    assert (c.hits, c.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    c = VersionedCache(max_entries=2)
+    c.get_or_load("a", [], lambda: 1)
+    c.get_or_load("b", [], lambda: 2)
+    c.get_or_load("a", [], lambda: 1)  # a is now the most recent
+    c.get_or_load("c", [], lambda: 3)
+
+    assert c.get_or_load("a", [], lambda: "reloaded") == 1
+    assert c.get_or_load("b", [], lambda: "reloaded") == "reloaded"
+
+
+def test_invalidating_a_tag_drops_only_entries_that_read_it():
+    c = VersionedCache()
+    squat, bench = exercise_tag("u", "Squat"), exercise_tag("u", "Bench")
+    c.get_or_load("squat", [squat], lambda: 1)
+    c.get_or_load("bench", [bench], lambda: 2)
+    c.get_or_load("both", [squat, bench], lambda: 3)
+
+    c.invalidate([squat])
+
+    assert c.get_or_load("squat", [squat], lambda: "new") == "new"
+    assert c.get_or_load("both", [squat, bench], lambda: "new") == "new"
+    assert c.get_or_load("bench", [bench], lambda: "new") == 2
+
+
+def test_write_during_load_leaves_the_entry_stale():
+    c = VersionedCache()
+    tag = exercise_tag("u", "Squat")
+
+    def load_racing_a_write():
+        c.invalidate([tag])
+        return "old"
+
+    assert c.get_or_load("k", [tag], load_racing_a_write) == "old"
+    assert c.get_or_load("k", [tag], lambda: "new") == "new"
+
+
+def test_tags_are_per_user():
+    c = VersionedCache()
+    c.get_or_load("k", [exercise_tag("u", "Squat")], lambda: 1)
+    c.invalidate([exercise_tag("v", "Squat")])
+    assert c.get_or_load("k", [exercise_tag("u", "Squat")], lambda: 2) == 1
+
+
+def test_period_tags_cover_every_week_in_range():
+    tags = period_tags("u", "day", date(2024, 1, 3), date(2024, 1, 15))
+    assert tags == [
+        week_tag("u", date(2024, 1, 1)),
+        week_tag("u", date(2024, 1, 8)),
+        week_tag("u", date(2024, 1, 15)),
+    ]
+
+
+def test_saved_workout_is_cached_until_its_week_is_saved(tmp_path):
+    db = SQLiteBackend(str(tmp_path / "workouts.db"))
+    db.ensure_schema()
+    backend = CachedBackend(db, VersionedCache())
+    day = date(2024, 1, 3)
+    squat = {"Workout": {"Squat": {"sets": 3, "reps": 5, "weight": 100.0}}}
+    backend.save_workout("u", day, "Legs", squat)
+    assert backend.get_workout("u", day, "Legs")["Squat"][3] == 100.0
+
+    # Served from memory: a write behind the cache's back isn't seen
+    db.save_workout("u", day, "Legs", {"Workout": {"Squat": {"sets": 3, "reps": 5, "weight": 90.0}}})
+    assert backend.get_workout("u", day, "Legs")["Squat"][3] == 100.0
+
+    backend.save_workout("u", date(2024, 1, 7), "Legs", squat)
+    assert backend.get_workout("u", day, "Legs")["Squat"][3] == 90.0
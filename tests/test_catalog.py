@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+import catalog
+from catalog import CATALOG_VERSION, CatalogStore, validate
+
+
+def catalog_data(**sections):
+    return {"version": CATALOG_VERSION, "workouts": {"Legs": sections or {"Workout": ["Squat"]}}}
+
+
+def test_valid_catalog_passes():
+    data = catalog_data(**{"Warm up": ["Cycle"], "Workout": ["Squat", "Lunge"]})
+
+    assert validate(data) == data["workouts"]
+
+
+def test_duplicate_exercise_is_rejected():
+    data = catalog_data(**{"Warm up": ["Squat"], "Workout": ["Squat"]})
+
+    with pytest.raises(ValueError, match="'Squat' is listed twice"):
+        validate(data)
+
+
+def test_same_exercise_in_two_workout_types_is_allowed():
+    data = catalog_data()
+    data["workouts"]["Full body"] = {"Workout": ["Squat"]}
+
+    assert validate(data) == data["workouts"]
+
+
+def test_unknown_section_is_rejected():
+    with pytest.raises(ValueError, match="unknown section 'Wokrout'"):
+        validate(catalog_data(Wokrout=["Squat"]))
+
+
+def test_wrong_version_is_rejected():
+    with pytest.raises(ValueError, match="catalog version"):
+        validate({**catalog_data(), "version": CATALOG_VERSION + 1})
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    # Explicit mtimes, so the reload doesn't depend on timestamp resolution
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_bad_reload_keeps_last_good_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "get_manifest", dict)
+    path = tmp_path / "catalog.json"
+    write(path, json.dumps(catalog_data()), 1_000_000_000)
+    store = CatalogStore(path)
+
+    write(path, '{"version": 1, "workouts": {', 2_000_000_000)
+    assert store.current().workouts == {"Legs": {"Workout": ["Squat"]}}
+    assert store.error.startswith("catalog.json: ")
+
+    write(path, json.dumps(catalog_data(Workout=["Squat", "Lunge"])), 3_000_000_000)
+    assert store.current().exercises == {"Legs": ("Squat", "Lunge")}
+    assert store.error is None
+
+
+def test_media_covers_every_exercise():
+    data = catalog_data(**{"Warm up": ["Cycle"], "Workout": ["Squat"]})
+    data["workouts"]["Full body"] = {"Workout": ["Squat", "Row"]}
+
+    media = catalog.Catalog(validate(data), {}).media
+
+    assert sorted(media) == ["Cycle", "Row", "Squat"]
@@ -0,0 +1,32 @@
+from datetime import date
+
+import journal
+from storage import SQLiteBackend, WriteBehindBackend
+
+
+def squat(weight):
+    return {"Workout": {"Squat": {"sets": 3, "reps": 5, "weight": weight}}}
+
+
+def write_behind(tmp_path, monkeypatch):
+    # The worker never runs, so saves stay pending in the journal
+    monkeypatch.setattr(journal.threading.Thread, "start", lambda self: None)
+    db = SQLiteBackend(str(tmp_path / "workouts.db"))
+    db.ensure_schema()
+    db.save_workout("u", date(2024, 6, 1), "Legs", squat(120.0))
+    return WriteBehindBackend(db, str(tmp_path / "journal.db"))
+
+
+def test_backdated_pending_save_keeps_the_stored_prefill(tmp_path, monkeypatch):
+    backend = write_behind(tmp_path, monkeypatch)
+    backend.save_workout("u", date(2024, 1, 1), "Legs", squat(80.0))
+
+    assert backend.get_last_exercises("u", ["Squat"])["Squat"][2] == 120.0
+
+
+def test_newer_pending_save_overrides_the_prefill(tmp_path, monkeypatch):
+    backend = write_behind(tmp_path, monkeypatch)
+    backend.save_workout("u", date(2024, 6, 1), "Legs", squat(125.0))
+    backend.save_workout("u", date(2024, 6, 8), "Legs", squat(130.0))
+
+    assert backend.get_last_exercises("u", ["Squat"])["Squat"][2] == 130.0
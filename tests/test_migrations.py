@@ -0,0 +1,34 @@
+import sqlite3
+
+from migrations import SQLITE_MIGRATIONS, _index_scans
+from storage import SQLITE_LAST_EXERCISES, SQLiteBackend
+
+
+def test_sqlite_prefill_reads_only_the_covering_index(tmp_path):
+    path = str(tmp_path / "workouts.db")
+    assert SQLiteBackend(path).ensure_schema() == SQLITE_MIGRATIONS[-1][0]
+
+    plan = sqlite3.connect(path).execute(
+        "EXPLAIN QUERY PLAN " + SQLITE_LAST_EXERCISES, ("u", '["Squat"]')
+    ).fetchall()
+
+    assert any(
+        "USING COVERING INDEX workouts_exercise_recent_idx" in row[3] for row in plan
+    )
+
+
+def test_index_scans_walks_nested_plans():
+    plan = {
+        "Node Type": "Unique",
+        "Plans": [{
+            "Node Type": "Append",
+            "Plans": [
+                {"Node Type": "Index Only Scan", "Index Name": "workouts_p3_idx"},
+                {"Node Type": "Index Scan", "Index Name": "workouts_p5_idx"},
+            ],
+        }],
+    }
+
+    assert _index_scans(plan) == {
+        ("Index Only Scan", "workouts_p3_idx"), ("Index Scan", "workouts_p5_idx"),
+    }
@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+
+from storage import SQLiteBackend
+
+DAY1, DAY2 = date(2024, 1, 1), date(2024, 1, 8)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "workouts.db"))
+    backend.ensure_schema()
+    return backend
+
+
+def save(backend, day, **values):
+    backend.save_workout("u", day, "Legs", {"Workout": {"Squat": values}})
+
+
+def records(backend):
+    return backend.get_personal_records("u", ["Squat"]).get("Squat", {})
+
+
+def rebuilt(backend):
+    backend.rebuild_records("u")
+    return records(backend)
+
+
+def test_new_best_raises_records(backend):
+    save(backend, DAY1, sets=3, reps=5, weight=100.0)
+    save(backend, DAY2, sets=3, reps=5, weight=120.0)
+
+    assert records(backend)[("weight", 0.0)] == (120.0, 100.0, str(DAY2))
+
+
+def test_correcting_a_record_down_recomputes_it(backend):
+    save(backend, DAY1, sets=3, reps=5, weight=100.0)
+    save(backend, DAY2, sets=3, reps=5, weight=500.0)
+    save(backend, DAY2, sets=3, reps=5, weight=50.0)
+
+    corrected = records(backend)
+    assert corrected[("weight", 0.0)] == (100.0, None, str(DAY1))
+    assert corrected[("volume", 0.0)] == (1500.0, None, str(DAY1))
+    # The typo's reps-at-weight record is gone, the corrected one is kept
+    assert ("reps", 500.0) not in corrected
+    assert corrected[("reps", 50.0)] == (5.0, None, str(DAY2))
+    assert corrected == rebuilt(backend)
+
+
+def test_correcting_the_only_log_down(backend):
+    save(backend, DAY1, sets=1, reps=1, weight=500.0)
+    save(backend, DAY1, sets=1, reps=1, weight=50.0)
+
+    assert records(backend)[("weight", 0.0)] == (50.0, None, str(DAY1))
+    assert records(backend) == rebuilt(backend)
+
+
+def test_per_set_correction(backend):
+    save(backend, DAY1, sets=2, reps=5, weight=60.0, set_reps=[5, 5], set_weights=[60.0, 60.0])
+    save(backend, DAY2, sets=2, reps=5, weight=90.0, set_reps=[8, 5], set_weights=[80.0, 90.0])
+    save(backend, DAY2, sets=2, reps=5, weight=70.0, set_reps=[8, 5], set_weights=[60.0, 70.0])
+
+    corrected = records(backend)
+    assert corrected[("reps", 60.0)] == (8.0, 5.0, str(DAY2))
+    assert ("reps", 80.0) not in corrected
+    assert corrected == rebuilt(backend)
+
+
+def test_clearing_an_exercise_removes_its_records(backend):
+    save(backend, DAY1, sets=3, reps=5, weight=100.0)
+    save(backend, DAY1, sets=0, reps=0, weight=0.0)
+
+    assert records(backend) == {}
@@ -0,0 +1,49 @@
+import io
+from datetime import date
+
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from storage import HISTORY_COLUMNS, SQLiteBackend
+from transfer import export_bytes
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "workouts.db"))
+    backend.ensure_schema()
+    backend.save_workout("u", date(2024, 1, 1), "Legs", {"Workout": {
+        "Squat": {"sets": 3, "reps": 5, "weight": 100.0},
+        "Lunge": {"sets": 2, "reps": 8, "weight": 20.0, "set_reps": [8, 6], "set_weights": [20.0, 25.0]},
+    }})
+    return backend
+
+
+def download(data):
+    # What st.download_button does with the value the data callable returns
+    return convert_data_to_bytes_and_infer_mime(data, TypeError("unsupported"))
+
+
+def test_csv_export_downloads(backend):
+    data, mime = download(export_bytes(backend, "u", "csv"))
+
+    lines = data.decode().splitlines()
+    assert mime == "application/octet-stream"
+    assert lines[0] == ",".join(HISTORY_COLUMNS)
+    assert len(lines) == 3
+
+
+def test_parquet_export_downloads(backend):
+    data, _ = download(export_bytes(backend, "u", "parquet"))
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column_names == list(HISTORY_COLUMNS)
+    assert sorted(table.column("exercise").to_pylist()) == ["Lunge", "Squat"]
+    assert [8, 6] in table.column("set_reps").to_pylist()
+
+
+def test_export_of_no_history_downloads(backend):
+    data, _ = download(export_bytes(backend, "nobody", "csv"))
+
+    assert data.decode().splitlines() == [",".join(HISTORY_COLUMNS)]
@@ -0,0 +1,176 @@
+import csv
+import io
+from datetime import date
+from itertools import islice
+
+from storage import EXPORT_CHUNK_SIZE, HISTORY_COLUMNS, set_list, workout_values
+
+# =========================
+# Bulk Export / Import
+# =========================
+# History moves through in chunks of EXPORT_CHUNK_SIZE rows in both
+# directions, so memory use doesn't grow with the size of the history.
+# Parquet needs pyarrow, which is only imported when it is used.
+IMPORT_COLUMNS = HISTORY_COLUMNS[:7]
+# Imported when present; rows without them are sets x reps
+SET_COLUMNS = HISTORY_COLUMNS[8:]
+FORMATS = ("csv", "parquet")
+MAX_REPORTED_ERRORS = 20
+
+
+def format_for(filename):
+    suffix = filename.rsplit(".", 1)[-1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file type: .{suffix} (use .csv or .parquet)")
+    return suffix
+
+
+# =========================
+# Export
+# =========================
+def parquet_schema(columns):
+    import pyarrow as pa
+
+    types = {
+        "workout_date": pa.date32(),
+        "sets": pa.int32(),
+        "reps": pa.int32(),
+        "weight": pa.float64(),
+        "set_reps": pa.list_(pa.int32()),
+        "set_weights": pa.list_(pa.float64()),
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in columns])
+
+
+def parquet_value(name, value):
+    if name == "workout_date":
+        return date.fromisoformat(str(value)[:10])
+    if name == "created_at":
+        return str(value)
+    if name in SET_COLUMNS:
+        return set_list(value)
+    return value
+
+
+def export_history(backend, user_id, out, fmt="csv", columns=HISTORY_COLUMNS):
+    # out is a binary file; only the requested columns are read
+    columns = list(columns)
+    if fmt == "csv":
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        backend.export_csv(user_id, columns, text)
+        text.flush()
+        text.detach()
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(columns)
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        # One row group per chunk
+        for chunk in backend.iter_history(user_id, columns, EXPORT_CHUNK_SIZE):
+            writer.write_table(pa.Table.from_arrays([
+                pa.array([parquet_value(name, row[i]) for row in chunk], schema.field(name).type)
+                for i, name in enumerate(columns)
+            ], schema=schema))
+
+
+def export_bytes(backend, user_id, fmt="csv", columns=HISTORY_COLUMNS):
+    # The whole export in memory, which is what st.download_button accepts
+    out = io.BytesIO()
+    export_history(backend, user_id, out, fmt, columns)
+    return out.getvalue()
+
+
+# =========================
+# Import
+# =========================
+def _read_csv(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    missing = set(IMPORT_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing columns: {sorted(missing)}")
+    while chunk := list(islice(reader, EXPORT_CHUNK_SIZE)):
+        yield chunk
+
+
+def _read_parquet(file):
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(file)
+    missing = set(IMPORT_COLUMNS) - set(parquet.schema_arrow.names)
+    if missing:
+        raise ValueError(f"Missing columns: {sorted(missing)}")
+    # Only the imported columns are decoded
+    columns = list(IMPORT_COLUMNS) + [
+        name for name in SET_COLUMNS if name in parquet.schema_arrow.names
+    ]
+    for batch in parquet.iter_batches(EXPORT_CHUNK_SIZE, columns=columns):
+        yield batch.to_pylist()
+
+
+def _validate(record):
+    workout_date = record["workout_date"]
+    if not isinstance(workout_date, date):
+        workout_date = date.fromisoformat(str(workout_date).strip()[:10])
+
+    text = []
+    for name in ("workout_type", "section", "exercise"):
+        value = str(record[name] or "").strip()
+        if not value:
+            raise ValueError(f"{name} is empty")
+        text.append(value)
+
+    sets, reps = int(record["sets"]), int(record["reps"])
+    weight = float(record["weight"])
+    if sets < 0 or reps < 0 or weight < 0:
+        raise ValueError("sets, reps and weight must not be negative")
+
+    # Per-set lists are JSON in CSV; an empty cell means none
+    per_set = {
+        name: set_list(record.get(name) or None) for name in SET_COLUMNS
+    }
+    return (str(workout_date), *text, *workout_values({
+        "sets": sets, "reps": reps, "weight": weight, **per_set
+    }))
+
+
+def _validated_chunks(chunks, report, archived_before=None):
+    # Rows dated before archived_before can't be written back; they are
+    # counted apart from the duplicates
+    line = 1
+    for chunk in chunks:
+        rows = []
+        for record in chunk:
+            line += 1
+            try:
+                row = _validate(record)
+            except (KeyError, TypeError, ValueError) as exc:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append(f"row {line}: {exc}")
+            else:
+                if archived_before and row[0] < archived_before:
+                    report["archived"] += 1
+                else:
+                    rows.append(row)
+        report["valid"] += len(rows)
+        if rows:
+            yield rows
+
+
+def import_history(backend, user_id, file, fmt="csv"):
+    # file is binary. Invalid rows and rows in archived history are reported
+    # and skipped; rows the user already has for the same day, type and
+    # exercise are kept as they are
+    report = {
+        "valid": 0, "inserted": 0, "duplicates": 0, "archived": 0, "invalid": 0, "errors": []
+    }
+    archived_before = backend.archived_before(user_id)
+    chunks = _read_csv(file) if fmt == "csv" else _read_parquet(file)
+    report["inserted"] = backend.import_history(user_id, _validated_chunks(
+        chunks, report, archived_before and str(archived_before)
+    ))
+    report["duplicates"] = report["valid"] - report["inserted"]
+    return report